@@ -21,6 +21,10 @@ Module implements helper functions to execute autogui commands from a command st
 Format: cmd1(x,y);cmd2(z)...
 """
 
+import collections
+import functools
+import re
+import threading
 import time
 import logging
 import os
@@ -109,161 +113,99 @@ def ag_par_xy(s):
 #########################
 # Parameter interpreters:
 #########################
+# An interpreter checks the parameters of a command and returns
+# (err, args, kwargs, desc) for the call of the autogui function.
+# desc is used in the error message if the call fails.
 
 
-def ag_cmd_key(func, cmd, s):
+def ag_cmd_key(cmd, s): # pylint: disable=unused-argument
     """
-    Call an autogui function with string as keyboard key as parameter
+    Interpret a string as keyboard key as parameter
     """
-    # calls pyautogui function with parameter (x)
+    # pyautogui function with parameter (x)
     err, s = ag_par_string(s)
     s = s.strip()
-    if err == "OK":
-        if s not in pyautogui.KEYBOARD_KEYS:
-            err = f"Parameter not in KEYBOARD_KEYS: {s}"
-            LOG.debug(err)
-        else:
-            try:
-                func(s)
-            except Exception as error: # pylint: disable=broad-exception-caught
-                err = f"Error calling pyautogui.{cmd} with ({s}): {error}"
-                LOG.debug(err)
-    return err
+    if err == "OK" and s not in pyautogui.KEYBOARD_KEYS:
+        err = f"Parameter not in KEYBOARD_KEYS: {s}"
+        LOG.debug(err)
+    return err, (s,), {}, f"({s})"
 
 
-def ag_cmd_string(func, cmd, s):
+def ag_cmd_string(cmd, s): # pylint: disable=unused-argument
     """
-    Call an autogui function with string as parameter
+    Interpret a string as parameter
     """
-    # calls pyautogui function with parameter (x)
+    # pyautogui function with parameter (x)
     err, s = ag_par_string(s)
-    if err == "OK":
-        try:
-            func(s)
-        except Exception as error: # pylint: disable=broad-exception-caught
-            err = f"Error calling pyautogui.{cmd} with ({s}): {error}"
-            LOG.debug(err)
-    return err
+    return err, (s,), {}, f"({s})"
 
 
-def ag_cmd_x(func, cmd, s):
+def ag_cmd_x(cmd, s): # pylint: disable=unused-argument
     """
-    Call an autogui function with integer as parameter
+    Interpret an integer as parameter
     """
-    # calls pyautogui function with parameter (x)
+    # pyautogui function with parameter (x)
     err, x = ag_par_x(s)
-    if err == "OK":
-        try:
-            func(x)
-        except Exception as error: # pylint: disable=broad-exception-caught
-            err = f"Error calling pyautogui.{cmd} with ({x}): {error}"
-            LOG.debug(err)
-    return err
+    return err, (x,), {}, f"({x})"
 
 
-def ag_cmd_ms(func, cmd, s):
+def ag_cmd_ms(cmd, s): # pylint: disable=unused-argument
     """
-    Call an autogui function with milli seconds as parameter
+    Interpret milli seconds as parameter
     """
-    # calls pyautogui function with parameter (x)/1000
+    # pyautogui function with parameter (x)/1000
     err, x = ag_par_x(s)
     if err == "OK":
-        try:
-            x = float(x) / 1000
-            func(x)
-        except Exception as error: # pylint: disable=broad-exception-caught
-            err = f"Error calling pyautogui.{cmd} with ({x}): {error}"
-            LOG.debug(err)
-    return err
+        x = float(x) / 1000
+    return err, (x,), {}, f"({x})"
 
 
-def ag_cmd_xy(func, cmd, s):
+def ag_cmd_xy(cmd, s): # pylint: disable=unused-argument
     """
-    Call an autogui function with two integers as parameter
+    Interpret two integers as parameter
     """
-    # calls pyautogui function with parameter (x,y)
+    # pyautogui function with parameter (x,y)
     err, x, y = ag_par_xy(s)
-    if err == "OK":
-        try:
-            func(x, y)
-        except Exception as error: # pylint: disable=broad-exception-caught
-            err = f"Error calling pyautogui.{cmd} with ({x},{y}): {error}"
-            LOG.debug(err)
-    return err
+    return err, (x, y), {}, f"({x},{y})"
 
 
-def ag_cmd_xy_right(func, cmd, s):
+def ag_cmd_xy_right(cmd, s): # pylint: disable=unused-argument
     """
-    Call an autogui function with two integers as parameters (right mouse button)
+    Interpret two integers as parameters (right mouse button)
     """
-    # calls pyautogui function with parameter (x,y)
+    # pyautogui function with parameter (x,y)
     err, x, y = ag_par_xy(s)
-    if err == "OK":
-        try:
-            func(x, y, button="right")
-        except Exception as error: # pylint: disable=broad-exception-caught
-            err = f"Error calling pyautogui.{cmd} with ({x},{y},button='right'): {error}"
-            LOG.debug(err)
-    return err
+    return err, (x, y), {"button": "right"}, f"({x},{y},button='right')"
 
 
-def ag_cmd_xy_middle(func, cmd, s):
+def ag_cmd_xy_middle(cmd, s): # pylint: disable=unused-argument
     """
-    Call an autogui function with two integers as parameters (middle mouse button)
+    Interpret two integers as parameters (middle mouse button)
     """
-    # calls pyautogui function with parameter (x,y)
+    # pyautogui function with parameter (x,y)
     err, x, y = ag_par_xy(s)
-    if err == "OK":
-        try:
-            func(x, y, button="middle")
-        except Exception as error: # pylint: disable=broad-exception-caught
-            err = (
-                f"Error calling pyautogui.{cmd} with ({x},{y},button='middle'): {error}"
-            )
-            LOG.debug(err)
-    return err
+    return err, (x, y), {"button": "middle"}, f"({x},{y},button='middle')"
 
 
-def ag_cmd(func, cmd):
+def ag_cmd(cmd): # pylint: disable=unused-argument
     """
-    Call an autogui function withou any parameter
+    Interpret a command without any parameter
     """
-    # calls pyautogui function withour parameter
-    err = "OK"
-    try:
-        func()
-    except Exception as error: # pylint: disable=broad-exception-caught
-        err = f"Error calling pyautogui.{cmd}: {error}"
-        LOG.debug(err)
-    return err
+    return "OK", (), {}, None
 
 
-def ag_cmd_right(func, cmd):
+def ag_cmd_right(cmd): # pylint: disable=unused-argument
     """
-    Call an autogui function without parameter (right mouse button)
+    Interpret a command without parameter (right mouse button)
     """
-    # calls pyautogui function withour parameter
-    err = "OK"
-    try:
-        func(button="right")
-    except Exception as error: # pylint: disable=broad-exception-caught
-        err = f"Error calling pyautogui.{cmd}: {error}"
-        LOG.debug(err)
-    return err
+    return "OK", (), {"button": "right"}, None
 
 
-def ag_cmd_middle(func, cmd):
+def ag_cmd_middle(cmd): # pylint: disable=unused-argument
     """
-    Call an autogui function without parameter (middle mouse button)
+    Interpret a command without parameter (middle mouse button)
     """
-    # calls pyautogui function withour parameter
-    err = "OK"
-    try:
-        func(button="middle")
-    except Exception as error: # pylint: disable=broad-exception-caught
-        err = f"Error calling pyautogui.{cmd}: {error}"
-        LOG.debug(err)
-    return err
+    return "OK", (), {"button": "middle"}, None
 
 
 #########################
@@ -303,137 +245,332 @@ commands = {
 }
 
 
-def call_autogui(cmd, params):
+class AutoguiProgram:
     """
-    Call a single autogui command
+    Compiled list of autogui commands. Every instruction is a tuple:
+    (func, args, kwargs, cmd, desc, text, stop)
+    text is the command as written in the command string. stop is True if
+    the command was terminated by ';'. Its error message is then marked with
+    the command text.
+    """
+
+    __slots__ = ("source", "instructions")
+
+    def __init__(self, source, instructions):
+        """Store the command string and the instructions"""
+        self.source = source
+        self.instructions = tuple(instructions)
+
+    def __len__(self):
+        """Returns the number of instructions"""
+        return len(self.instructions)
+
+
+def compile_autogui(cmd, params, text):
+    """
+    Compile a single autogui command. Returns (err, instruction)
     """
     # functions interpreter for autogui commands
     cmd = cmd.strip().lower()
     if len(params) > 0:
         # its a command with parameter
-        if cmd in commandsWithPar:
-            return commandsWithPar[cmd]["interpreter"](
-                commandsWithPar[cmd]["autogui"], cmd, params.strip()
-            )
-        return f"Unknown command: '{cmd}({params})'"
-    # its a command without parameter
-    if cmd in commands:
-        return commands[cmd]["interpreter"](commands[cmd]["autogui"], cmd)
-    return f"Unknown command: '{cmd}'"
-
-#Define states of autogui syntax parser:
-S_CMD_NAME = 0 # state=0: concat command name characters
-S_PARAMS = 1 # state=1: concat parameter characters
-S_STRING1 = 2 # state=2: concat a string in ' character in parameters
-S_STRING2 = 3 # state=3: concat a string in " character in parameters
-S_CMD_END = 4 # state=4: command end reached
-S_STRING_END = 5 # state=5: string parameter end reached
-
-def call_autogui_cmd_list(msg): # pylint: disable=too-many-return-statements,too-many-branches,too-many-statements
+        if cmd not in commandsWithPar:
+            return f"Unknown command: '{cmd}({params})'", None
+        entry = commandsWithPar[cmd]
+        err, args, kwargs, desc = entry["interpreter"](cmd, params.strip())
+    else:
+        # its a command without parameter
+        if cmd not in commands:
+            return f"Unknown command: '{cmd}'", None
+        entry = commands[cmd]
+        err, args, kwargs, desc = entry["interpreter"](cmd)
+    return err, (entry["autogui"], args, kwargs, cmd, desc, text, False)
+
+
+def run_autogui(instruction):
     """
-    Call a list of autogui commands seperated by ';'
+    Call a single compiled autogui command
     """
-    # Execute an autogui command list separated by ';'
-    cmd = ""
-    params = ""
-    state = S_CMD_NAME
-    esc = False  # previous caracter was an escape character \ in a string
-    msg = msg.strip()
-    feedback = "OK"  # last command feedback
-    for c in msg:
-        if esc is True:
-            # just take the current character
-            params += c
-            esc = False
-            continue
-        if c == "(" and state == S_CMD_NAME:
-            # switch to parameters state
-            state = S_PARAMS
-            continue
-        if c == ")" and state in (S_PARAMS,S_STRING_END):
-            # switch to parameters state
-            state = S_CMD_END
-            continue
-        if c == '"':
-            if state not in (S_CMD_NAME,S_CMD_END,S_STRING_END):
-                if state == S_STRING2:
-                    # end of string with ":
-                    state = S_STRING_END
-                else:
-                    if state == S_PARAMS:
-                        # start of string with ":
-                        state = S_STRING2
-                params += c
-                continue
-            return (
-                f'Syntax error. Character " is not allowed here: {cmd}({params}).'
-            )
-        if c == "'":
-            if state not in (S_CMD_NAME,S_CMD_END,S_STRING_END):
-                if state == S_STRING1:
-                    # end of string with ':
-                    state = S_STRING_END
-                else:
-                    if state == S_PARAMS:
-                        # start of string with ':
-                        state = S_STRING1
-                params += c
-                continue
-            return (
-                f"Syntax error. Character ' is not allowed here: {cmd}({params})."
-            )
+    func, args, kwargs, cmd, desc, text, stop = instruction
+    LOG.info("Excecute command: '%s'", text)
+    try:
+        func(*args, **kwargs)
+    except Exception as error: # pylint: disable=broad-exception-caught
+        if desc is None:
+            err = f"Error calling pyautogui.{cmd}: {error}"
+        else:
+            err = f"Error calling pyautogui.{cmd} with {desc}: {error}"
+        LOG.debug(err)
+        if stop is True:
+            return f"Error with command: '{text}':{err}. Stop."
+        return err
+    return "OK"
+
+
+#Define the spans of the autogui syntax tokenizer:
+NAME_SPAN = re.compile(r"\w*") # characters of a command name
+PARAMS_SPAN = re.compile(r"[^)'\"\\;]*") # parameter characters outside of strings
+STRING_SPAN = {
+    "'": re.compile(r"([^'\\]*(?:\\.[^'\\]*)*)'", re.S), # string in ' characters
+    '"': re.compile(r'([^"\\]*(?:\\.[^"\\]*)*)"', re.S), # string in " characters
+}
+ESCAPE_RUN = re.compile(r"\\+") # sequence of escape characters
+SPACE_SPAN = re.compile(r"\s*") # white spaces after a parameter list or a string
+
+PROGRAM_CACHE_SIZE = 64 # number of compiled command lists which are cached
+
+# policies to add a program to the autogui worker
+POLICY_QUEUE = "queue" # execute after all pending programs
+POLICY_REPLACE = "replace" # replace all pending programs
+POLICY_PREEMPT = "preempt" # replace all pending programs and cancel the running one
+POLICIES = (POLICY_QUEUE, POLICY_REPLACE, POLICY_PREEMPT)
+# feedback prefixes of the autogui worker
+EXEC = "EXEC: "
+CANCELED = "CANCELED: "
+
+
+def scan_name(source, pos):
+    """
+    Scan the command name starting at pos. Returns (err, cmd, pos)
+    """
+    end = NAME_SPAN.match(source, pos).end()
+    cmd = source[pos:end]
+    for i, c in enumerate(cmd):
+        # \w contains some numeric characters which are not allowed
+        if not (c.isdigit() or c.isalpha() or c == "_"):
+            return f"Not allowed character in command name: '{cmd[:i + 1]}'. Stop.", cmd, end
+    return "OK", cmd, end
+
+
+def unescape(s):
+    """
+    Removes the escape characters of a string
+    """
+    if "\\\\" not in s:
+        # every escape character is followed by a normal character
+        return s.replace("\\", "")
+    # a sequence of n escape characters contains n//2 escaped escape characters
+    return ESCAPE_RUN.sub(lambda match: "\\" * (len(match.group()) // 2), s)
+
+
+def scan_string(source, pos, parts):
+    """
+    Scan a string parameter starting after the opening quote at pos.
+    The string is added to parts without the escape characters.
+    Returns the position after the closing quote or -1 if it is not terminated.
+    """
+    quote = source[pos - 1]
+    match = STRING_SPAN[quote].match(source, pos)
+    if match is None:
+        # not terminated: the string takes the rest of the source
+        parts.append(quote + unescape(source[pos:]))
+        return -1
+    parts.append(quote + unescape(match.group(1)) + quote)
+    return match.end()
+
+
+def scan_params(source, pos, cmd): # pylint: disable=too-many-return-statements
+    """
+    Scan the parameters of a command starting after the opening bracket at pos.
+    Returns (err, params, pos). pos is -1 if the end of the source was reached
+    before the closing bracket.
+    """
+    parts = []
+    end = len(source)
+    while True:
+        stop = PARAMS_SPAN.match(source, pos).end()
+        parts.append(source[pos:stop])
+        if stop >= end:
+            return "OK", "".join(parts), -1
+        c = source[stop]
+        if c == ")":
+            return "OK", "".join(parts), stop + 1
         if c == ";":
-            if state in (S_CMD_NAME,S_CMD_END):
-                # end of command reached
-                LOG.info("Excecute command: '%s(%s)'", cmd, params)
-                feedback = call_autogui(cmd, params)
-                if feedback != "OK":
-                    if state == S_CMD_NAME:
-                        return f"Error with command: '{cmd}':{feedback}. Stop."
-                    return f"Error with command: '{cmd}({params})':{feedback}. Stop."
-                cmd = ""
-                params = ""
-                state = S_CMD_NAME
-                continue
-            if state == S_PARAMS:
-                return f"Error missing closing bracket: '{cmd}':{feedback}. Stop."
-        if c == ',':
-            if state == S_STRING_END:
-                #next parameter starts
-                state = S_PARAMS
+            return f"Error missing closing bracket: '{cmd}':OK. Stop.", "", stop
         if c == "\\":
-            if state in (S_STRING1,S_STRING2):
-                # escape caracter in string
-                esc = True
-                continue
-            if state == S_CMD_NAME:
-                return f"Esc char outside strings not allowed: '{cmd}'."
-            return f"Esc char outside strings not allowed: '{cmd}({params})'."
-
-        # add this character to the command or params
-        if state == S_CMD_NAME:
-            if c.isdigit() or c.isalpha() or c == "_":
-                cmd += c
-            else:
-                return f"Not allowed character in command name: '{cmd}{c}'. Stop."
-        else:
-            if state not in [S_CMD_END,S_STRING_END]:
-                params += c
-            else:
-                if not c.isspace():
+            return f"Esc char outside strings not allowed: '{cmd}({''.join(parts)})'.", "", stop
+        # c is a quote: start of a string
+        pos = scan_string(source, stop + 1, parts)
+        if pos < 0:
+            return "OK", "".join(parts), -1
+        # after the string only a closing bracket or the next parameter is allowed
+        pos = SPACE_SPAN.match(source, pos).end()
+        c = source[pos] if pos < end else ""
+        if c == ")":
+            return "OK", "".join(parts), pos + 1
+        if c == ",":
+            parts.append(c)
+            pos += 1
+            continue
+        if c == "":
+            return "OK", "".join(parts), -1
+        return after_params_error(cmd, "".join(parts), c), "", pos
+
+
+def after_params_error(cmd, params, c):
+    """
+    Error message for a not allowed character c after a parameter list
+    """
+    if c in "'\"":
+        return f"Syntax error. Character {c} is not allowed here: {cmd}({params})."
+    if c == "\\":
+        return f"Esc char outside strings not allowed: '{cmd}({params})'."
+    return f"Wrong character after: '{cmd}({params}){c}'. Stop."
+
+
+@functools.lru_cache(maxsize=PROGRAM_CACHE_SIZE)
+def compile_autogui_cmd_list(msg): # pylint: disable=too-many-return-statements,too-many-branches
+    """
+    Compile a list of autogui commands seperated by ';'
+    Returns (err, program). program is None if err is not "OK".
+    The result is cached, the same command string is only compiled once.
+    """
+    source = msg.strip()
+    end = len(source)
+    instructions = []
+    pos = 0
+    while True:
+        err, cmd, pos = scan_name(source, pos)
+        if err != "OK":
+            return err, None
+        c = source[pos] if pos < end else ""
+        params = ""
+        text = cmd
+        if c == "(":
+            err, params, pos = scan_params(source, pos + 1, cmd)
+            if err != "OK":
+                return err, None
+            if pos < 0:
+                # end reached inside of the parameters
+                if len(cmd) > 0:
                     return (
-                        f"Wrong character after: '{cmd}({params}){c}'. Stop."
-                    )
-
-    # excecute the last cmd
-    if len(cmd) > 0 and feedback == "OK":
-        if state == S_CMD_NAME:
-            LOG.info("Excecute command: '%s'",cmd)
-            return call_autogui(cmd, params)
-        if state == S_CMD_END:
-            LOG.info("Excecute command: '%s(%s)'",cmd,params)
-            return call_autogui(cmd, params)
-        return (
-            f"Syntax error with command. Unterminated string: '{cmd}({params})'"
-        )
-    return feedback
+                        f"Syntax error with command. Unterminated string: '{cmd}({params})'"
+                    ), None
+                break
+            text = f"{cmd}({params})"
+            pos = SPACE_SPAN.match(source, pos).end()
+            c = source[pos] if pos < end else ""
+            if c not in (";", ""):
+                return after_params_error(cmd, params, c), None
+        elif c in ("'", '"'):
+            return f"Syntax error. Character {c} is not allowed here: {cmd}().", None
+        elif c == "\\":
+            return f"Esc char outside strings not allowed: '{cmd}'.", None
+        elif c not in (";", ""):
+            return f"Not allowed character in command name: '{cmd}{c}'. Stop.", None
+        if c == "":
+            # the last command
+            if len(cmd) > 0:
+                err, instruction = compile_autogui(cmd, params, text)
+                if err != "OK":
+                    return err, None
+                instructions.append(instruction)
+            break
+        # end of command reached with ;
+        err, instruction = compile_autogui(cmd, params, text)
+        if err != "OK":
+            return f"Error with command: '{text}':{err}. Stop.", None
+        instructions.append(instruction[:-1] + (True,))
+        pos += 1
+    return "OK", AutoguiProgram(source, instructions)
+
+
+def run_autogui_program(program, cancel=None):
+    """
+    Execute a compiled list of autogui commands. Stops at the first error.
+    cancel is an optional threading.Event. If it is set, the execution stops
+    before the next command. A running wait command is interrupted.
+    """
+    for instruction in program.instructions:
+        if cancel is not None:
+            if cancel.is_set():
+                break
+            if instruction[0] is time.sleep:
+                # wait for the cancel event instead of sleeping
+                instruction = (cancel.wait,) + instruction[1:]
+        feedback = run_autogui(instruction)
+        if feedback != "OK":
+            return feedback
+    if cancel is not None and cancel.is_set():
+        LOG.info("Command list canceled: '%s'", program.source)
+        return CANCELED + program.source
+    return "OK"
+
+
+def call_autogui_cmd_list(msg):
+    """
+    Call a list of autogui commands seperated by ';'
+    """
+    err, program = compile_autogui_cmd_list(msg)
+    if err != "OK":
+        return err
+    return run_autogui_program(program)
+
+
+
+class AutoguiWorker(threading.Thread):
+    """
+    Thread which executes compiled autogui programs one after the other.
+    New programs are added with a policy:
+    queue: the program is executed after all pending programs
+    replace: the program replaces all pending programs
+    preempt: like replace, additionally the running program is canceled
+    Every program can have a tag (e.g. a job) which is handed over to the call backs:
+    callback(feedback, tag) is called when a program starts and when it ends.
+    dropped(tag) is called when a pending program is dropped.
+    """
+
+    def __init__(self, callback, dropped=None):
+        """Create the worker thread"""
+        threading.Thread.__init__(self, name="AutoguiWorker", daemon=True)
+        self.callback = callback
+        self.dropped = dropped
+        self.lock = threading.Condition()
+        self.pending = collections.deque()  # [program, tag] which wait for execution
+        self.running = None  # program which is currently executed
+        self.cancel_event = threading.Event()  # cancels the running program
+
+    def drop_pending(self):
+        """Drop all pending programs. Must be called with lock"""
+        for program, tag in self.pending:
+            LOG.info("Pending command list dropped: '%s'", program.source)
+            if self.dropped is not None:
+                self.dropped(tag)
+        self.pending.clear()
+
+    def submit(self, program, policy=POLICY_QUEUE, tag=None):
+        """Add a program to the queue of the worker"""
+        with self.lock:
+            if policy in (POLICY_REPLACE, POLICY_PREEMPT):
+                self.drop_pending()
+            if policy == POLICY_PREEMPT and self.running is not None:
+                self.cancel_event.set()
+            self.pending.append((program, tag))
+            self.lock.notify()
+
+    def cancel(self):
+        """
+        Cancel the running program and drop all pending programs.
+        Returns False if there was nothing to cancel.
+        """
+        with self.lock:
+            canceled = self.running is not None or len(self.pending) > 0
+            self.drop_pending()
+            if self.running is not None:
+                self.cancel_event.set()
+        return canceled
+
+    def run(self):
+        """Execute the queued programs"""
+        while True:
+            with self.lock:
+                while len(self.pending) == 0:
+                    self.lock.wait()
+                program, tag = self.pending.popleft()
+                self.running = program
+                self.cancel_event.clear()
+            self.callback(EXEC + program.source, tag)
+            feedback = run_autogui_program(program, self.cancel_event)
+            with self.lock:
+                self.running = None
+            self.callback(feedback, tag)
@@ -0,0 +1,327 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution:
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Module implements classes to read and write the backlight attributes
+of the display (brightness, bl_power). Either over the sysfs files directly
+or over the configured shell commands.
+"""
+
+import logging
+import os
+import select
+import subprocess
+import threading
+import time
+
+#
+# global constants
+#
+READ_SIZE = 32  # maximal size of a sysfs attribute value
+DEFAULT_WINDOW = 0.2  # default time in seconds between two brightness writes
+DEFAULT_FRAME_RATE = 25  # default number of brightness writes per second during a transition
+MAX_TRANSITION = 300  # maximal transition time in seconds
+
+#
+# initialize logger
+#
+LOG = logging.getLogger("BacklightAPI")
+logging.basicConfig()
+
+
+def backlight_log(level, handler):
+    """
+    set the log level of the module
+    """
+    LOG.setLevel(level)
+    if handler is not None:
+        LOG.addHandler(handler)
+
+
+class ShellAttribute:
+    """
+    Reads and writes a backlight attribute with the configured shell commands
+    """
+
+    def __init__(self, get_cmd, set_cmd, display_id):
+        """Store the command templates"""
+        self.get_cmd = get_cmd.format(displayID=display_id)
+        self.set_cmd = set_cmd
+        self.display_id = display_id
+
+    def read(self):
+        """Returns (err, value) of the attribute"""
+        return subprocess.getstatusoutput(self.get_cmd)
+
+    def write(self, value):
+        """Writes a value to the attribute. Returns (err, msg)"""
+        cmd = self.set_cmd.format(value=value, displayID=self.display_id)
+        LOG.debug("Call: %s", cmd)
+        return subprocess.getstatusoutput(cmd)
+
+    def close(self):
+        """Nothing to close for shell commands"""
+
+
+class SysfsAttribute:
+    """
+    Keeps a sysfs attribute file open and reads it with pread.
+    If the file is not writable for the current user, writes are
+    done with the shell fallback.
+    """
+
+    def __init__(self, path, fallback=None):
+        """Open the sysfs file. Raises OSError if the file can not be opened"""
+        self.path = path
+        self.fallback = fallback
+        self.writable = True
+        try:
+            self.fd = os.open(path, os.O_RDWR)
+        except PermissionError:
+            self.fd = os.open(path, os.O_RDONLY)
+            self.writable = False
+            LOG.info("No write access to %s. Use shell command for writing", path)
+
+    def fileno(self):
+        """Returns the file descriptor of the open attribute file"""
+        return self.fd
+
+    def read(self):
+        """Returns (err, value) of the attribute"""
+        try:
+            return 0, os.pread(self.fd, READ_SIZE, 0).decode().strip()
+        except OSError as error:
+            return error.errno, str(error)
+
+    def write(self, value):
+        """Writes a value to the attribute. Returns (err, msg)"""
+        if self.writable is False:
+            if self.fallback is None:
+                return 1, f"No write access to {self.path}"
+            return self.fallback.write(value)
+        try:
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            os.write(self.fd, str(value).encode())
+        except OSError as error:
+            return error.errno, str(error)
+        return 0, ""
+
+    def close(self):
+        """Close the attribute file"""
+        os.close(self.fd)
+
+
+def create_attribute(path, get_cmd, set_cmd, display_id):
+    """
+    Creates the backlight attribute. If a sysfs path is given the file is used
+    directly, the shell commands are used as fallback if it can not be opened.
+    """
+    shell = ShellAttribute(get_cmd, set_cmd, display_id)
+    if path is None or path == "":
+        return shell
+    path = path.format(displayID=display_id)
+    try:
+        return SysfsAttribute(path, shell)
+    except OSError as error:
+        LOG.warning("Can not open %s: %s. Use shell commands instead", path, error)
+        return shell
+
+
+class BacklightWatcher(threading.Thread):
+    """
+    Thread which blocks on change notifications (POLLPRI) of sysfs attribute
+    files and calls a call back with the key of the changed attribute.
+    Works only for attributes which are notified by the kernel driver
+    (e.g. actual_brightness). Regular files never wake up the thread.
+    """
+
+    def __init__(self, callback):
+        """Create the watcher. callback(key) is called on every change"""
+        threading.Thread.__init__(self, name="BacklightWatcher", daemon=True)
+        self.callback = callback
+        self.poller = select.poll()
+        self.watched = {}  # dictionary with watched files: Key: fd, Value: [key, attribute, value]
+
+    def add(self, key, path):
+        """
+        Watch a sysfs file for changes.
+        Returns False if the file can not be opened.
+        """
+        try:
+            attribute = SysfsAttribute(path)
+        except OSError as error:
+            LOG.warning("Can not watch %s: %s", path, error)
+            return False
+        # first read is needed to arm the notification
+        err, value = attribute.read()
+        if err != 0:
+            LOG.warning("Can not watch %s: %s", path, value)
+            attribute.close()
+            return False
+        self.watched[attribute.fileno()] = [key, attribute, value]
+        self.poller.register(attribute.fileno(), select.POLLPRI | select.POLLERR)
+        LOG.info("Watch %s for changes of %s", path, key)
+        return True
+
+    def count(self):
+        """Returns the number of watched files"""
+        return len(self.watched)
+
+    def run(self):
+        """Wait for notifications and call the call back on changed values"""
+        while True:
+            for fd, event in self.poller.poll():
+                key, attribute, value = self.watched[fd]
+                # read the new value, this arms the next notification
+                err, new_value = attribute.read()
+                if err != 0:
+                    LOG.error("Error %s reading %s: %s", err, attribute.path, new_value)
+                    self.poller.unregister(fd)
+                    continue
+                LOG.debug("Event %s on %s: %s", event, attribute.path, new_value)
+                if new_value != value:
+                    self.watched[fd][2] = new_value
+                    self.callback(key)
+
+
+class BrightnessActuator(threading.Thread): # pylint: disable=too-many-instance-attributes
+    """
+    Thread which writes brightness values to the attribute. Within the window
+    (seconds) after a write, only the latest received value is written when
+    the window ends. Values which are superseded by a newer value are dropped.
+    A value with a transition time is ramped from the current brightness to
+    the value with a fixed frame rate. A new value cancels a running ramp.
+    callback() is called after every applied value.
+    """
+
+    def __init__(self, attribute, window=DEFAULT_WINDOW, callback=None, frame_rate=DEFAULT_FRAME_RATE): # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """Create the actuator thread"""
+        threading.Thread.__init__(self, name="BrightnessActuator", daemon=True)
+        self.attribute = attribute
+        self.window = window
+        self.callback = callback
+        self.frame_rate = frame_rate
+        self.lock = threading.Condition()
+        self.target = None  # latest value which is not written yet
+        self.transition = 0  # transition time in seconds of the target
+        self.last_write = time.monotonic() - window
+        self.received = 0  # number of received values
+        self.applied = 0  # number of written values
+        self.dropped = 0  # number of superseded values
+        self.frames = 0  # number of writes during transitions
+        self.canceled = 0  # number of canceled transitions
+
+    def set(self, value, transition=0):
+        """
+        Set a new brightness value. The brightness is changed within transition
+        seconds. Can be called from every thread
+        """
+        with self.lock:
+            self.received += 1
+            if self.target is not None:
+                self.dropped += 1
+                LOG.debug("Brightness %s superseded by %s", self.target, value)
+            self.target = value
+            self.transition = transition
+            self.lock.notify()
+
+    def statistics(self):
+        """Returns the counters of the actuator"""
+        with self.lock:
+            return {
+                "received": self.received,
+                "applied": self.applied,
+                "dropped": self.dropped,
+                "frames": self.frames,
+                "canceled": self.canceled,
+            }
+
+    def can_ramp(self):
+        """Transitions are only done if the attribute file can be written directly"""
+        return isinstance(self.attribute, SysfsAttribute) and self.attribute.writable is True
+
+    def write(self, value):
+        """Write a value to the attribute. Returns True on success"""
+        err, msg = self.attribute.write(value)
+        if err != 0:
+            LOG.error("Error %s writing brightness %s: %s", err, value, msg)
+            return False
+        return True
+
+    def ramp(self, value, transition):
+        """
+        Change the brightness to value within transition seconds.
+        Frame n is written n / frame_rate seconds after the start of the ramp,
+        so the last frame is written when the transition time is over.
+        The ramp is canceled if a new value is received.
+        """
+        err, start = self.attribute.read()
+        try:
+            start = int(start) if err == 0 else value
+        except ValueError:
+            start = value
+        frames = max(1, round(transition * self.frame_rate))
+        begin = time.monotonic()
+        current = start
+        for frame in range(1, frames + 1):
+            # wait for the time of the frame, a new value wakes up the thread
+            with self.lock:
+                delay = begin + frame / self.frame_rate - time.monotonic()
+                if delay > 0 and self.target is None:
+                    self.lock.wait(delay)
+                if self.target is not None:
+                    self.canceled += 1
+                    LOG.debug("Transition to %s canceled at %s", value, current)
+                    return
+            step = round(start + (value - start) * frame / frames)
+            if step != current:
+                if self.write(step) is False:
+                    return
+                current = step
+                with self.lock:
+                    self.frames += 1
+
+    def run(self):
+        """Write the latest value at most once per window"""
+        while True:
+            with self.lock:
+                while self.target is None:
+                    self.lock.wait()
+                delay = self.last_write + self.window - time.monotonic()
+                if delay > 0:
+                    # wait for the end of the window, newer values replace the target
+                    self.lock.wait(delay)
+                    continue
+                value = self.target
+                transition = self.transition
+                self.target = None
+                self.last_write = time.monotonic()
+                self.applied += 1
+            try:
+                if transition > 0 and self.can_ramp() is True:
+                    self.ramp(value, transition)
+                else:
+                    if transition > 0:
+                        LOG.info(
+                            "No write access to the brightness file, transition skipped: %s", value
+                        )
+                    self.write(value)
+                if self.callback is not None:
+                    self.callback()
+            except Exception as error: # pylint: disable=broad-exception-caught
+                # the thread must keep running for the next values
+                LOG.error("Error applying brightness %s: %s", value, error)
@@ -22,11 +22,17 @@
 Module implements a base class for MQTT clients based on paho.mqtt
 """
 
+import collections
 import configparser
+import heapq
+import json
 import logging
 import logging.handlers
+import math
 import os
+import random
 import sys
+import threading
 import time
 from paho.mqtt import client as mqtt_client
 from base_mqtt_client import ha_discover as HA
@@ -41,6 +47,15 @@ LOG_ROTATE_WHEN = "midnight"
 LOG_BACKUP_COUNT = 5
 MANUFACTURER = "githab olialb"
 MODEL = "FullPageOS"
+RECONNECT_MAX_DELAY = 300  # default maximal backoff delay in seconds between two connect attempts
+AVAILABILITY_TOPIC = "availability"  # topic with the online/offline state of the client
+OUTBOX_SIZE = 64  # maximal number of topics which are kept while the client is offline
+HA_BIRTH_DELAY = 10  # default maximal random delay in seconds before re-announcing to home assistant
+HA_MODE_ENTITY = "entity"  # one discovery message per entity
+HA_MODE_DEVICE = "device"  # one discovery message with all entities of the device
+# flush order of the outbox after a reconnect
+PRIORITY_DISCOVERY = 0
+PRIORITY_STATE = 1
 
 #
 # class definitions
@@ -55,11 +70,37 @@ class BaseMqttClient: #pylint: ...disable=too-many-instance-attributes
         self.config_file = config_file
 
         # other global attributes
-        self.reconnect_delay = 5  # retry in seconds to try to reconnect mgtt broker
+        self.reconnect_delay = 5  # base delay in seconds of the reconnect backoff
+        self.reconnect_max_delay = RECONNECT_MAX_DELAY  # cap of the reconnect backoff
         self.publish_delay = 3  # delay between two publish loops in seconds
         self.full_publish_cycle = 20  # Every publishcycle*fullPublishCycle
         self.topic_root = None  # Root path for all topics
         self.unpublished = True  # set to true if the topics are not published yet
+        self.full_publish_request = True  # request to publish all topics at next deadline
+        self.publish_requests = set()  # keys of topics which should be published immediately
+        self.publish_lock = threading.Lock()
+        self.publish_wakeup = threading.Event()  # wakes up the publish loop
+        self.command_lock = threading.Condition()  # protects the command queue
+        self.command_queue = collections.deque()  # received commands: [key, payload, time]
+        self.command_pending = {}  # queued commands which can be replaced: Key: topic key
+        self.command_worker = None  # thread which executes the received commands
+        self.connection_lost = threading.Event()  # set by on_disconnect
+        self.connection_manager = None  # thread which reconnects to the broker
+        self.connect_attempts = 0  # connect attempts since the connection was lost
+        self.disconnected_at = None  # monotonic time when the connection was lost
+        self.connection_info = {"reconnects": 0, "attempts": 0, "outage": 0}
+        self.online = False  # True if messages can be sent to the broker
+        self.outbox_lock = threading.Lock()  # protects online and the outbox
+        self.outbox = {}  # latest message per topic while offline: [priority, payload, retain]
+        self.outbox_info = {"queued": 0, "replaced": 0, "dropped": 0, "flushed": 0}
+        self.publish_cache = {}  # last published value per topic: (value, payload, hash)
+        self.ha_pending = None  # discovery messages collected by ha_discover(): Key: topic
+        self.ha_lock = threading.Lock()  # serializes discover()
+        self.ha_queued = {}  # hashes of discovery messages in the outbox: Key: topic
+        self.ha_birth_delay = HA_BIRTH_DELAY  # maximal delay after the home assistant birth message
+        self.ha_birth_timer = None  # timer which re-announces the device to home assistant
+        self.ha_abbreviate = False  # use the abbreviated keys in the discovery messages
+        self.ha_mode = HA_MODE_ENTITY  # discovery per entity or per device
         self.client = None  # mqtt client
 
         # broker config:
@@ -85,7 +126,14 @@ class BaseMqttClient: #pylint: ...disable=too-many-instance-attributes
         self.read_config_file()
 
         #create ha discovery class
-        self.ha = HA.HADiscovery(self.ha_device_name, self.ha_base, self.manufacturer, self.model)
+        self.ha = HA.HADiscovery(
+            self.ha_device_name,
+            self.ha_base,
+            self.manufacturer,
+            self.model,
+            self.ha_abbreviate,
+            self.topic_root,
+        )
 
     def read_logging_config(self, config):
         """Read logging config from ini file"""
@@ -164,6 +212,8 @@ class BaseMqttClient: #pylint: ...disable=too-many-instance-attributes
                 config["global"]["topicRoot"] + "/" + config["global"]["deviceName"]
             )
             self.reconnect_delay = int(config["global"]["reconnectDelay"])
+            if "reconnectMaxDelay" in config["global"]:
+                self.reconnect_max_delay = int(config["global"]["reconnectMaxDelay"])
             self.publish_delay = int(config["global"]["publishDelay"])
             self.full_publish_cycle = int(config["global"]["fullPublishCycle"])
 
@@ -174,6 +224,15 @@ class BaseMqttClient: #pylint: ...disable=too-many-instance-attributes
                     self.ha_dc = True
             self.ha_device_name = config["haDiscover"]["deviceName"]
             self.ha_base = config["haDiscover"]["base"]
+            if "birthDelay" in config["haDiscover"]:
+                self.ha_birth_delay = float(config["haDiscover"]["birthDelay"])
+            if "abbreviate" in config["haDiscover"]:
+                self.ha_abbreviate = config["haDiscover"]["abbreviate"].lower() == "true"
+            if "mode" in config["haDiscover"]:
+                self.ha_mode = config["haDiscover"]["mode"].lower()
+                if self.ha_mode not in (HA_MODE_ENTITY, HA_MODE_DEVICE):
+                    self.log.error("Unknown mode in [haDiscover] section: %s", self.ha_mode)
+                    sys.exit()
             if "model" in config["haDiscover"]:
                 self.model = config["haDiscover"]["model"]
             if "manufacturer" in config["haDiscover"]:
@@ -182,6 +241,9 @@ class BaseMqttClient: #pylint: ...disable=too-many-instance-attributes
             #call call back for addition config data
             self.read_client_config( config )
 
+            #read optional publish schedule of the topics
+            self.read_schedule_config( config )
+
         except KeyError as inst:
             self.log.error("Error while reading ini file: %s", inst)
             sys.exit()
@@ -189,6 +251,34 @@ class BaseMqttClient: #pylint: ...disable=too-many-instance-attributes
     def read_client_config( self, config):
         """This method can be overwritten to read more config data from ini file"""
 
+    def read_schedule_config( self, config ):
+        """
+        Reads the optional [schedule] section. For every topic key the entries
+        <key>Interval, <key>FullPublish and <key>Jitter (seconds) overwrite the
+        publish schedule of the topic descriptor. Intervals must be positive
+        and the jitter must not be negative, other values are ignored.
+        """
+        if "schedule" not in config:
+            return
+        options = {"Interval": "interval", "FullPublish": "full_publish", "Jitter": "jitter"}
+        for key, topic_config in self.topic_config.items():
+            for option, attr in options.items():
+                if key + option in config["schedule"]:
+                    try:
+                        value = float(config["schedule"][key + option])
+                    except ValueError as error:
+                        self.log.error("Error while reading ini file: %s", error)
+                        sys.exit()
+                    if not math.isfinite(value) or value < 0 or (value == 0 and attr != "jitter"):
+                        self.log.warning(
+                            "Invalid value in [schedule] section ignored: %s%s=%s",
+                            key,
+                            option,
+                            value,
+                        )
+                        continue
+                    topic_config[attr] = value
+
     @classmethod
     def on_connect(cls, client, inst, flags, rc, properties): #pylint: disable=too-many-arguments,too-many-positional-arguments,unused-argument
         """Method called on connect to broker"""
@@ -196,25 +286,25 @@ class BaseMqttClient: #pylint: ...disable=too-many-instance-attributes
             inst.log.info("Connected to MQTT Broker!")
             # make the subscritions at the broker
             inst.subscribe()
+            inst.flush_outbox()
+            if inst.disconnected_at is not None:
+                inst.connection_restored()
         else:
             inst.log.warning("Failed to connect, return code %s", rc)
 
     @classmethod
     def on_disconnect(cls, client, inst, flags, rc, properties): #pylint: disable=too-many-arguments,too-many-positional-arguments,unused-argument
-        """Method called on disconnect from broker"""
+        """
+        Method called on disconnect from broker. The reconnect is done by
+        the connection manager thread and not in the network thread
+        """
         inst.log.info("Disconnected with result code: %s", rc)
-        inst.unpublished = True
-        inst.brightness = -1
-        while True:
-            inst.log.info("Reconnecting in %s seconds...", inst.reconnect_delay)
-            time.sleep(inst.reconnect_delay)
-
-            try:
-                client.reconnect()
-                inst.log.info("Reconnected successfully!")
-                return
-            except OSError as err:
-                inst.log.warning("%s. Reconnect failed. Retrying...", err)
+        with inst.outbox_lock:
+            inst.online = False
+        inst.request_full_publish()
+        if inst.disconnected_at is None:
+            inst.disconnected_at = time.monotonic()
+        inst.connection_lost.set()
 
     @classmethod
     def on_message(cls, client, inst, msg):  # pylint: disable=unused-argument
@@ -225,6 +315,11 @@ class BaseMqttClient: #pylint: ...disable=too-many-instance-attributes
             "Received `%s` from `%s` topic", msg.payload.decode().strip(), msg.topic
         )
 
+        # birth message of home assistant
+        if msg.topic == inst.ha_status_topic():
+            inst.ha_status(msg.payload.decode().strip())
+            return
+
         # check received topic syntax
         if msg.topic[0 : len(inst.topic_root)] == inst.topic_root:
             topic = msg.topic[len(inst.topic_root) : len(msg.topic)]
@@ -240,11 +335,9 @@ class BaseMqttClient: #pylint: ...disable=too-many-instance-attributes
                     break
 
             if topic_key is not None:
-                # call the configured command
+                # queue the command for the command worker
                 if "set" in inst.topic_config[topic_key]:
-                    inst.topic_config[topic_key]["set"](
-                        inst.topic_config[topic_key], msg.payload.decode()
-                    )
+                    inst.dispatch_command(topic_key, msg.payload.decode())
                 else:
                     inst.log.info(
                         "Command for topic without command received from broker %s",
@@ -255,33 +348,170 @@ class BaseMqttClient: #pylint: ...disable=too-many-instance-attributes
         else:
             inst.log.info("Wrong topic syntax received from broker %s", msg.topic)
 
-    def connect(self) -> mqtt_client:
+    def dispatch_command(self, key, payload):
         """
-        Method to connect to the mqtt broker
+        Puts a received command into the queue of the command worker.
+        A command replaces the queued command of the same topic, if it is not
+        executed yet (latest wins). Topics with the descriptor key
+        "coalesce": False keep all commands (e.g. command lists).
+        """
+        with self.command_lock:
+            entry = self.command_pending.get(key)
+            if entry is not None:
+                self.log.debug("Queued command of topic %s replaced: '%s'", key, entry[1])
+                entry[1] = payload
+                return
+            entry = [key, payload, time.monotonic()]
+            self.command_queue.append(entry)
+            if self.topic_config[key].get("coalesce", True) is True:
+                self.command_pending[key] = entry
+            self.command_lock.notify()
+
+    def command_loop(self):
+        """
+        Main loop of the command worker. Executes the set methods of the
+        received commands outside of the network thread of the mqtt client
         """
-        self.client = mqtt_client.Client(mqtt_client.CallbackAPIVersion.VERSION2)
-        if self.username != "":
-            self.client.username_pw_set(self.username, self.password)
-        self.client.on_connect = BaseMqttClient.on_connect
-        self.client.on_disconnect = BaseMqttClient.on_disconnect
         while True:
+            with self.command_lock:
+                while len(self.command_queue) == 0:
+                    self.command_lock.wait()
+                entry = self.command_queue.popleft()
+                key, payload, received = entry
+                if self.command_pending.get(key) is entry:
+                    del self.command_pending[key]
+            self.log.debug(
+                "Execute command of topic %s after %.3f s", key, time.monotonic() - received
+            )
+            topic_config = self.topic_config[key]
             try:
-                self.client.connect(self.broker, self.port)
-            except OSError as error:
+                topic_config["set"](topic_config, payload)
+            except Exception as error: # pylint: disable=broad-exception-caught
+                self.log.error("Error while executing command of topic %s: %s", key, error)
+
+    def backoff_delay(self, attempt):
+        """
+        Returns the delay before the next connect attempt: exponential backoff
+        with full jitter, a random delay between 0 and
+        min(reconnectMaxDelay, reconnectDelay * 2^attempt). The random delay
+        avoids that all clients reconnect at the same time after a broker restart.
+        """
+        ceiling = min(self.reconnect_max_delay, self.reconnect_delay * 2 ** min(attempt, 32))
+        return random.uniform(0, ceiling)
+
+    def connect_broker(self, first):
+        """
+        Connects to the broker and starts the network loop. Retries with
+        backoff until the server accepts the connection. The first connect
+        is tried immediately, a reconnect waits the backoff delay before.
+        """
+        while True:
+            if first is False or self.connect_attempts > 0:
+                delay = self.backoff_delay(self.connect_attempts)
+                self.log.info("Connect attempt %s in %.1f seconds...", self.connect_attempts + 1, delay)
+                time.sleep(delay)
+            self.connect_attempts += 1
+            try:
+                if first is True:
+                    self.client.connect(self.broker, self.port)
+                else:
+                    self.client.reconnect()
+            except (OSError, ValueError) as error:
                 self.log.warning(
                     "Error while connect to server %s:%s: %s",
                     self.broker,
                     self.port,
                     error,
                 )
-                time.sleep(self.reconnect_delay)
                 continue
             break
+        # start main loop of mqtt client
+        self.client.loop_start()
+
+    def connection_loop(self):
+        """
+        Main loop of the connection manager. Waits until the connection is
+        lost and reconnects outside of the network thread of the mqtt client
+        """
+        while True:
+            self.connection_lost.wait()
+            self.connection_lost.clear()
+            try:
+                # wait until the network loop has terminated
+                self.stop_network_loop()
+                self.connect_broker(False)
+            except Exception as error: # pylint: disable=broad-exception-caught
+                # the connection manager must not terminate: try again
+                self.log.error("Error during reconnect: %s", error)
+                time.sleep(self.reconnect_delay)
+                self.connection_lost.set()
+
+    def stop_network_loop(self):
+        """
+        Stops the network loop of the mqtt client. The network thread
+        may already have terminated after the connection was lost.
+        """
+        try:
+            self.client.loop_stop()
+        except AttributeError:
+            # paho removed the thread between its check and the join
+            self.log.debug("Network loop already terminated")
+
+    def connection_restored(self):
+        """
+        Called in the network thread when the connection is established again.
+        Stores the number of connect attempts and the outage duration
+        """
+        outage = time.monotonic() - self.disconnected_at
+        self.connection_info = {
+            "reconnects": self.connection_info["reconnects"] + 1,
+            "attempts": self.connect_attempts,
+            "outage": round(outage, 1),
+        }
+        self.log.info(
+            "Reconnected after %.1f seconds and %s attempts", outage, self.connect_attempts
+        )
+        self.disconnected_at = None
+        self.connect_attempts = 0
+        self.reconnect_callback()
+
+    def reconnect_callback(self):
+        """
+        This call back is called after a reconnect and can be overwritten by child class
+        """
+
+    def connect(self) -> mqtt_client:
+        """
+        Method to connect to the mqtt broker
+        """
+        # start the worker which executes the received commands
+        if self.command_worker is None:
+            self.command_worker = threading.Thread(
+                target=self.command_loop, name="CommandWorker", daemon=True
+            )
+            self.command_worker.start()
+        # the connection manager reconnects, not the network loop of paho
+        self.client = mqtt_client.Client(
+            mqtt_client.CallbackAPIVersion.VERSION2, reconnect_on_failure=False
+        )
+        if self.username != "":
+            self.client.username_pw_set(self.username, self.password)
+        self.client.on_connect = BaseMqttClient.on_connect
+        self.client.on_disconnect = BaseMqttClient.on_disconnect
+        # the broker publishes offline if the connection is lost
+        self.client.will_set(self.availability_topic(), "offline", retain=True)
         # set user data for call backs
         self.client.user_data_set(self)
 
-        # start main loop of mqtt client
-        self.client.loop_start()
+        self.connect_broker(True)
+        self.connect_attempts = 0
+
+        # start the thread which reconnects if the connection is lost
+        if self.connection_manager is None:
+            self.connection_manager = threading.Thread(
+                target=self.connection_loop, name="ConnectionManager", daemon=True
+            )
+            self.connection_manager.start()
 
     def subscribe(self):
         """
@@ -293,56 +523,366 @@ class BaseMqttClient: #pylint: ...disable=too-many-instance-attributes
                 topic = self.topic_root + f"/{topic_config['topic']}/set"
                 self.client.subscribe(topic)
                 self.log.debug("Subscribe to: %s", topic)
+        # home assistant publishes online after a restart
+        if self.ha_dc is True:
+            self.client.subscribe(self.ha_status_topic())
+            self.log.debug("Subscribe to: %s", self.ha_status_topic())
         self.client.on_message = BaseMqttClient.on_message
 
-    def ha_publish(self, topic, payload):
-        """Publish ha discovery topics"""
-        if self.ha_dc is True:
-            # publish new entity
-            result = self.client.publish(topic, payload, retain=True)
-        else:
-            # delete entity
-            result = self.client.publish(topic, "", retain=True)
+    def availability_topic(self):
+        """Returns the topic of the online/offline state"""
+        return f"{self.topic_root}/{AVAILABILITY_TOPIC}"
+
+    def publish(self, topic, payload, retain=False, priority=PRIORITY_STATE):
+        """
+        Publish a message. While the client is offline only the latest
+        message of every topic is kept in the outbox and sent after the
+        reconnect. Returns the result of client.publish() or a success
+        result if the message was put into the outbox.
+        """
+        with self.outbox_lock:
+            if self.online is True:
+                result = self.client.publish(topic, payload, retain=retain)
+                if result[0] != mqtt_client.MQTT_ERR_NO_CONN:
+                    return result
+            if topic in self.outbox:
+                self.outbox_info["replaced"] += 1
+            elif len(self.outbox) >= OUTBOX_SIZE:
+                self.outbox_info["dropped"] += 1
+                self.log.warning("Outbox is full. Drop message of topic %s", topic)
+                return (mqtt_client.MQTT_ERR_QUEUE_SIZE, None)
+            self.outbox[topic] = [priority, payload, retain]
+            self.outbox_info["queued"] += 1
+        return (mqtt_client.MQTT_ERR_SUCCESS, None)
+
+    def flush_outbox(self):
+        """
+        Sends the availability and all messages of the outbox after a (re)connect.
+        Discovery messages are sent before the states.
+        """
+        with self.outbox_lock:
+            self.client.publish(self.availability_topic(), "online", retain=True)
+            messages = sorted(self.outbox.items(), key=lambda item: item[1][0])
+            self.outbox = {}
+            discovery = []
+            for topic, (priority, payload, retain) in messages:
+                result = self.client.publish(topic, payload, retain=retain)
+                if priority == PRIORITY_DISCOVERY and result[0] == mqtt_client.MQTT_ERR_SUCCESS:
+                    discovery.append(topic)
+            self.outbox_info["flushed"] += len(messages)
+            self.online = True
+        if len(messages) > 0:
+            self.log.info("Sent %s messages of the outbox", len(messages))
+        if len(discovery) > 0:
+            self.ha_confirm(discovery)
+
+    def outbox_statistics(self):
+        """Returns the counters and the current size of the outbox"""
+        with self.outbox_lock:
+            info = dict(self.outbox_info)
+            info["topics"] = len(self.outbox)
+            info["bytes"] = sum(
+                len(topic) + len(message[1]) for topic, message in self.outbox.items()
+            )
+            return info
+
+    def ha_send(self, topic, payload):
+        """
+        Send a retained ha discovery message. An empty payload deletes the entity.
+        Returns the result code of publish()
+        """
+        result = self.publish(topic, payload, retain=True, priority=PRIORITY_DISCOVERY)
         status = result[0]
         if status == 0:
             self.log.debug("Send '%s' to topic %s", payload, topic)
         else:
             self.log.error("Failed to send message to topic %s", topic)
+        return status
+
+    @staticmethod
+    def ha_set_hash(hashes, topic, digest):
+        """Stores the hash of a sent message. The hash None removes the topic"""
+        if digest is None:
+            hashes.pop(topic, None)
+        else:
+            hashes[topic] = digest
+
+    def ha_sent(self, hashes, topic, digest, status):
+        """
+        Updates the hash of a discovery message after ha_send(). A failed message
+        keeps its old hash, the hash of a message in the outbox is stored when
+        the outbox is sent. Must be called with ha_lock
+        """
+        if status != mqtt_client.MQTT_ERR_SUCCESS:
+            return
+        with self.outbox_lock:
+            queued = topic in self.outbox
+        if queued is True:
+            self.ha_queued[topic] = digest
+        else:
+            self.ha_queued.pop(topic, None)
+            self.ha_set_hash(hashes, topic, digest)
+
+    def ha_confirm(self, topics):
+        """Stores the hashes of the discovery messages which were sent from the outbox"""
+        with self.ha_lock:
+            confirmed = {
+                topic: self.ha_queued.pop(topic) for topic in topics if topic in self.ha_queued
+            }
+            if len(confirmed) == 0:
+                return
+            hashes = self.ha.read_hashes()
+            if hashes is None:
+                hashes = {}
+            for topic, digest in confirmed.items():
+                self.ha_set_hash(hashes, topic, digest)
+            try:
+                self.ha.write_hashes(hashes)
+            except OSError as error:
+                self.log.error("Error while writing ha discovery hashes: %s", error)
+
+    def ha_publish(self, topic, payload):
+        """Add a ha discovery message. It is sent by discover() if it changed"""
+        if self.ha_pending is None:
+            # called outside of discover()
+            self.ha_send(topic, payload if self.ha_dc is True else "")
+            return
+        self.ha_pending[topic] = payload
 
     def ha_discover(self):
         """
         publish all topics needed for the home assistant mqtt discovery
-        this method must be implemented by the child class
+        with ha_publish(). This method must be implemented by the child class
+        """
+
+    def discover(self, force=False):
+        """
+        Sends the home assistant discovery messages of ha_discover(). Only
+        messages which changed since the last call are sent, the hashes of
+        the payloads are stored in a file next to the ha uid. Entities which
+        are not discovered anymore (or all if the discovery is disabled) are
+        deleted with an empty retained message. force sends all messages.
         """
+        with self.ha_lock:
+            self.discover_changed(force)
+
+    def discover_changed(self, force):
+        """
+        Collects the discovery messages and sends the changed ones.
+        Must be called with ha_lock
+        """
+        self.ha_pending = {}
+        try:
+            self.ha_discover()
+            discovered = self.ha_pending
+        finally:
+            self.ha_pending = None
+        if self.ha_mode == HA_MODE_DEVICE and len(discovered) > 0:
+            # one message with all entities
+            discovered = dict([self.ha.device_discovery(discovered)])
+        wanted = discovered if self.ha_dc is True else {}
+        known = self.ha.read_hashes()
+        if known is None:
+            # unknown what was published before: send everything
+            known = dict.fromkeys(discovered)
+        # a topic keeps its old hash until its message is sent
+        hashes = dict(known)
+        # delete the removed entities before the new configs are sent
+        removed = [topic for topic in known if topic not in wanted]
+        for topic in removed:
+            self.ha_sent(hashes, topic, None, self.ha_send(topic, ""))
+        sent = 0
+        for topic, payload in wanted.items():
+            digest = self.ha.payload_hash(payload)
+            if force is True or known.get(topic) != digest:
+                self.ha_sent(hashes, topic, digest, self.ha_send(topic, payload))
+                sent += 1
+        try:
+            self.ha.write_hashes(hashes)
+        except OSError as error:
+            self.log.error("Error while writing ha discovery hashes: %s", error)
+        self.log.info(
+            "HA discovery: %s of %s configs sent, %s removed", sent, len(wanted), len(removed)
+        )
+
+    def ha_status_topic(self):
+        """Returns the topic of the home assistant birth and last will message"""
+        return f"{self.ha_base}/status"
+
+    def ha_status(self, status):
+        """
+        Called with the home assistant status. If home assistant comes online
+        the device is announced again after a random delay, so that not all
+        devices send at the same time
+        """
+        if status != "online":
+            return
+        delay = random.uniform(0, self.ha_birth_delay)
+        self.log.info("Home assistant is online. Announce device in %.1f seconds", delay)
+        if self.ha_birth_timer is not None:
+            self.ha_birth_timer.cancel()
+        self.ha_birth_timer = threading.Timer(delay, self.ha_announce)
+        self.ha_birth_timer.daemon = True
+        self.ha_birth_timer.start()
+
+    def ha_announce(self):
+        """
+        Sends all discovery messages and publishes all topics once
+        """
+        self.discover(force=True)
+        self.request_full_publish()
+        for key, topic_config in self.topic_config.items():
+            if "publish" in topic_config:
+                self.publish_now(key)
 
     def publish_loop_callback(self):
         """
         This call back is called by publish loop and can be overwritten by child class
         """
 
+    def request_full_publish(self):
+        """
+        All topics are published at their next deadline even if no data changed
+        """
+        self.full_publish_request = True
+
+    def publish_now(self, key):
+        """
+        Requests to publish the topic with this key immediately.
+        Can be called from every thread
+        """
+        with self.publish_lock:
+            self.publish_requests.add(key)
+        self.publish_wakeup.set()
+
+    def schedule_requests(self, schedule):
+        """
+        Moves the deadline of all requested topics to now
+        """
+        with self.publish_lock:
+            requests = self.publish_requests
+            self.publish_requests = set()
+        now = time.monotonic()
+        for entry in schedule:
+            if entry[2] in requests:
+                entry[0] = now
+        heapq.heapify(schedule)
+
+    def publish_schedule(self):
+        """
+        Creates the heap with the publish deadlines of all topics.
+        Heap entries: [deadline, order, topic key, nominal deadline]
+        The topic key None is used for the publish loop call back
+        """
+        now = time.monotonic()
+        schedule = []
+        for key, topic_config in self.topic_config.items():
+            if "publish" in topic_config:
+                schedule.append([now, len(schedule), key, now])
+        schedule.append([now + self.publish_delay, len(schedule), None, now + self.publish_delay])
+        heapq.heapify(schedule)
+        return schedule
+
+    def publish_topic(self, topic_config):
+        """
+        Calls the publish method of a topic. The publish method returns the
+        value of the topic or None if there is nothing to publish. It can set
+        self.unpublished to True to send the value even if it did not change
+        """
+        topic = f"{self.topic_root}/{topic_config['topic']}"
+        value = topic_config["publish"](topic, topic_config)
+        if value is not None:
+            self.publish_value(topic, value, self.unpublished)
+
+    def publish_value(self, topic, value, force=False):
+        """
+        Publishes the value of a topic if it is different to the last published
+        value or force is True. The last value, its payload and the hash of the
+        payload are cached per topic, so unchanged values are neither serialized
+        nor sent again. Dictionaries, lists and tuples are sent as json.
+        Publish methods must return new objects and not modify published ones.
+        """
+        cached = self.publish_cache.get(topic)
+        if force is False and cached is not None and cached[0] == value:
+            return
+        if isinstance(value, bytes):
+            payload = value
+        elif isinstance(value, str):
+            payload = value.encode()
+        elif isinstance(value, (dict, list, tuple)):
+            payload = json.dumps(value).encode()
+        else:
+            payload = str(value).encode()
+        digest = hash(payload)
+        if force is False and cached is not None and cached[2] == digest and cached[1] == payload:
+            # different object with the same content
+            self.publish_cache[topic] = (value, payload, digest)
+            return
+        result = self.publish(topic, payload)
+        # result: [0, 1]
+        status = result[0]
+        if status == 0:
+            self.log.debug("Send '%s' to topic %s", value, topic)
+            self.publish_cache[topic] = (value, payload, digest)
+        else:
+            self.log.error("Failed to send message to topic %s", topic)
+
     def publish_loop(self):
         """
-        endless main publish loop
+        endless main publish loop. Every topic is published at its own deadline
+        on the monotonic clock. The topic descriptor can define the keys:
+        "interval": publish interval in seconds (default: publishDelay)
+        "full_publish": period in seconds to publish even if no data changed
+        (default: publishDelay*fullPublishCycle)
+        "jitter": maximal random delay in seconds added to each deadline (default: 0)
         """
-        # endless publish loop
-        self.unpublished = True
-        loop_counter = 0
+        self.request_full_publish()
+        schedule = self.publish_schedule()
+        full_publish_due = {}  # next full publish deadline per topic key
         try:
             while True:
-                for topic_config in self.topic_config.values():
-                    if "publish" in topic_config:
-                        topic = f"{self.topic_root}/{topic_config['topic']}"
-                        topic_config["publish"](topic, topic_config)
-                # mark the topics as published
-                self.unpublished = False
-                # delay until next loo starts
-                time.sleep(self.publish_delay)
-                # call publish loop call back to allow child class to add additional cyclic stuff
-                self.publish_loop_callback()
-                # call time time tick of chrome pages
-                loop_counter += 1
-                if loop_counter > self.full_publish_cycle:
-                    loop_counter = 0
-                    self.unpublished = True
+                # sleep until the next deadline is reached
+                delay = schedule[0][0] - time.monotonic()
+                if delay > 0:
+                    if self.publish_wakeup.wait(delay) is True:
+                        self.publish_wakeup.clear()
+                        self.schedule_requests(schedule)
+                    continue
+                now = time.monotonic()
+                entry = schedule[0]
+                key = entry[2]
+                if self.full_publish_request is True:
+                    # publish all topics at their next deadline
+                    self.full_publish_request = False
+                    full_publish_due.clear()
+
+                if key is None:
+                    # call publish loop call back to allow child class to add additional cyclic stuff
+                    self.publish_loop_callback()
+                    interval = self.publish_delay
+                    jitter = 0
+                else:
+                    topic_config = self.topic_config[key]
+                    interval = topic_config.get("interval", self.publish_delay)
+                    jitter = topic_config.get("jitter", 0)
+                    # is a full publish of this topic needed?
+                    self.unpublished = now >= full_publish_due.get(key, now)
+                    if self.unpublished is True:
+                        full_publish_due[key] = now + topic_config.get(
+                            "full_publish", self.publish_delay * self.full_publish_cycle
+                        )
+                    self.publish_topic(topic_config)
+                    # mark the topic as published
+                    self.unpublished = False
+
+                # next deadline is calculated from the nominal deadline to avoid drift
+                nominal = entry[3] + interval
+                now = time.monotonic()
+                if nominal < now:
+                    # publisher was too slow, skip the missed deadlines
+                    nominal = now + interval
+                entry[3] = nominal
+                entry[0] = nominal + random.uniform(0, jitter) if jitter > 0 else nominal
+                heapq.heapreplace(schedule, entry)
         except KeyboardInterrupt:
             self.log.warning("Keyboard interrupt receiced. Stop client...")
@@ -20,12 +20,46 @@
 in  mqtt topics
 """
 
+import hashlib
 import uuid
 import json
 import os
 
 #File to store the home assistant discovery uid
 UUID_FILE = ".ha_uuid"
+#File to store the hashes of the published discovery payloads
+HASH_FILE = ".ha_hashes"
+#origin of the discovery messages
+ORIGIN_NAME = "mqttDisplayClient"
+ORIGIN_URL = "https://github.com/olialb/mqttDisplayClient"
+#abbreviations of the configuration keys supported by home assistant
+ABBREVIATIONS = {
+    "unique_id": "uniq_id",
+    "state_topic": "stat_t",
+    "command_topic": "cmd_t",
+    "device": "dev",
+    "value_template": "val_tpl",
+    "unit_of_measurement": "unit_of_meas",
+    "device_class": "dev_cla",
+    "icon": "ic",
+    "payload_on": "pl_on",
+    "payload_off": "pl_off",
+    "state_on": "stat_on",
+    "state_off": "stat_off",
+    "options": "ops",
+    "brightness_scale": "bri_scl",
+    "brightness_command_topic": "bri_cmd_t",
+    "brightness_state_topic": "bri_stat_t",
+    "state_value_template": "stat_val_tpl",
+    "brightness_value_template": "bri_val_tpl",
+    "supported_color_modes": "sup_clrm",
+}
+DEVICE_ABBREVIATIONS = {
+    "identifiers": "ids",
+    "manufacturer": "mf",
+    "model": "mdl",
+}
+TOPIC_BASE = "~"
 
 #
 # this file defines everthing whats needed to publish
@@ -37,14 +71,20 @@ class HADiscovery:
     """Implements methods to create content for home assitant
     auto discovery mqtt topics"""
 
-    def __init__(
+    def __init__( # pylint: disable=too-many-arguments, too-many-positional-arguments
         self,
         device_name="MyDevice",
         base="homeassitant",
         manufacturer="MyCompany",
         model="MyModel",
+        abbreviate=False,
+        topic_base=None,
     ):
-        """Create class default values"""
+        """
+        Create class default values. With abbreviate the payloads use the
+        abbreviated keys of home assistant and topics below topic_base
+        start with ~
+        """
         if os.path.isfile(UUID_FILE):
             with open(UUID_FILE, "r", encoding="utf-8") as f:
                 self.uid = str(f.read()).strip()
@@ -56,6 +96,34 @@ class HADiscovery:
         self.base = base
         self.manufacturer = manufacturer
         self.model = model
+        self.abbreviate = abbreviate
+        self.topic_base = topic_base
+
+    @staticmethod
+    def payload_hash(payload):
+        """Returns the hash of a discovery payload"""
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    @staticmethod
+    def read_hashes():
+        """
+        Returns the hashes of the last published discovery payloads
+        Key: topic, Value: hash or None if the hashes are not known
+        """
+        try:
+            with open(HASH_FILE, "r", encoding="utf-8") as f:
+                hashes = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(hashes, dict):
+            return None
+        return hashes
+
+    @staticmethod
+    def write_hashes(hashes):
+        """Stores the hashes of the published discovery payloads"""
+        with open(HASH_FILE, "w", encoding="utf-8") as f:
+            json.dump(hashes, f, indent=1, sort_keys=True)
 
     def device(self):
         """json content of a device"""
@@ -64,8 +132,64 @@ class HADiscovery:
         js["identifiers"] = self.device_name + "_" + self.uid
         js["manufacturer"] = self.manufacturer
         js["model"] = self.model
+        if self.abbreviate is True:
+            return {DEVICE_ABBREVIATIONS.get(key, key): value for key, value in js.items()}
         return js
 
+    def compact(self, js):
+        """
+        Returns the config with abbreviated keys and topics relative to
+        the topic base if abbreviate is enabled
+        """
+        if self.abbreviate is False:
+            return js
+        compact = {}
+        for key, value in js.items():
+            if (
+                self.topic_base is not None
+                and key.endswith("topic")
+                and value.startswith(self.topic_base + "/")
+            ):
+                value = TOPIC_BASE + value[len(self.topic_base):]
+                compact[TOPIC_BASE] = self.topic_base
+            compact[ABBREVIATIONS.get(key, key)] = value
+        return compact
+
+    def payload(self, js):
+        """json payload of an entity config with the device"""
+        js["device"] = self.device()
+        return json.dumps(self.compact(js))
+
+    def device_discovery(self, configs):
+        """
+        Combines the entity configs (Key: topic, Value: payload) to one
+        device based discovery message. Returns topic and payload.
+        """
+        components = {}
+        for topic, payload in configs.items():
+            # topic: <base>/<platform>/<uid>/<object id>/config
+            platform, _, object_id = topic.split("/")[-4:-1]
+            js = json.loads(payload)
+            js.pop("device", None)
+            js.pop("dev", None)
+            js.pop(TOPIC_BASE, None)
+            js["platform" if self.abbreviate is False else "p"] = platform
+            if object_id in components:
+                object_id = platform + "_" + object_id
+            components[object_id] = js
+        js = {}
+        if self.abbreviate is True:
+            js["dev"] = self.device()
+            js["o"] = {"name": ORIGIN_NAME, "url": ORIGIN_URL}
+            if self.topic_base is not None:
+                js[TOPIC_BASE] = self.topic_base
+        else:
+            js["device"] = self.device()
+            js["origin"] = {"name": ORIGIN_NAME, "url": ORIGIN_URL}
+        js["cmps" if self.abbreviate is True else "components"] = components
+        topic = self.base + "/device/" + self.uid + "/config"
+        return topic, json.dumps(js)
+
     def sensor( # pylint: disable=too-many-arguments, too-many-positional-arguments
         self,
         name,
@@ -90,8 +214,7 @@ class HADiscovery:
             js["device_class"] = device_class
         if icon is not None:
             js['icon'] = "mdi:"+icon
-        js["device"] = self.device()
-        return topic, json.dumps(js)
+        return topic, self.payload(js)
 
     def switch(self, name, state_topic, value_template=None):
         """json content of a switch"""
@@ -108,8 +231,7 @@ class HADiscovery:
         js["state_off"] = "OFF"
         if value_template is not None:
             js["value_template"] = "{{ value_json." + value_template + " }}"
-        js["device"] = self.device()
-        return topic, json.dumps(js)
+        return topic, self.payload(js)
 
     def text(self, name, state_topic, value_template=None):
         """json content of a text entity"""
@@ -122,8 +244,7 @@ class HADiscovery:
         js["state_topic"] = state_topic
         if value_template is not None:
             js["value_template"] = "{{ value_json." + value_template + " }}"
-        js["device"] = self.device()
-        return topic, json.dumps(js)
+        return topic, self.payload(js)
 
     def select(self, name, state_topic, options, value_template=None):
         """json content of a select entity"""
@@ -137,8 +258,7 @@ class HADiscovery:
         js["options"] = options
         if value_template is not None:
             js["value_template"] = "{{ value_json." + value_template + " }}"
-        js["device"] = self.device()
-        return topic, json.dumps(js)
+        return topic, self.payload(js)
 
     def light( # pylint: disable=too-many-arguments, too-many-positional-arguments
         self,
@@ -170,5 +290,23 @@ class HADiscovery:
             js["brightness_value_template"] = (
                 "{{ value_json." + value_tmpl_brightness + " }}"
             )
-        js["device"] = self.device()
-        return topic, json.dumps(js)
+        return topic, self.payload(js)
+
+    def json_light(self, name, state_topic, brightness_scale=100):
+        """
+        json content of a light with json schema. State and commands are
+        json objects with state, brightness and transition (seconds).
+        Home assistant supports transitions only for lights with this schema.
+        """
+        uid = self.uid
+        topic = self.base + "/light/" + uid + "/" + name.replace(" ", "_") + "/config"
+        js = {}
+        js["name"] = name
+        js["unique_id"] = self.uid + "_" + name.replace(" ", "_")
+        js["schema"] = "json"
+        js["command_topic"] = state_topic + "/set"
+        js["state_topic"] = state_topic
+        js["brightness"] = True
+        js["brightness_scale"] = brightness_scale
+        js["supported_color_modes"] = ["brightness"]
+        return topic, self.payload(js)
@@ -0,0 +1,102 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Micro benchmark of the autogui command parser.
+
+pyautogui is replaced by a stub module which does nothing, so the benchmark
+runs headless and measures only the tokenizer and the compiler.
+Call with -e to execute the compiled programs with the stub as well.
+"""
+
+import os
+import sys
+import time
+import timeit
+import types
+
+
+def stub_pyautogui():
+    """Install a pyautogui module which does nothing"""
+    stub = types.ModuleType("pyautogui")
+    stub.KEYBOARD_KEYS = ["enter", "tab", "space", "a", "b"]
+    stub.FAILSAFE = False
+    for name in (
+        "click", "doubleClick", "moveTo", "move", "dragTo", "scroll", "hscroll",
+        "write", "press", "keyDown", "mouseDown", "mouseUp",
+    ):
+        setattr(stub, name, lambda *args, **kwargs: None)
+    sys.modules["pyautogui"] = stub
+
+
+# import test object
+sys.path.append(os.path.abspath("./"))
+stub_pyautogui()
+from autogui_commands import compile_autogui_cmd_list, run_autogui_program # pylint: disable=wrong-import-position
+
+#
+# global constants
+#
+KB = 1024
+# command lists: name, command string, loops
+CASES = [
+    ("short macro", "wait(1000);click(569,75)", 20000),
+    ("panel macro", "moveto(10,10);click();press('tab');press('enter');scroll(-5)", 10000),
+    ("500 commands", "click(1,2);" * 499 + "click(1,2)", 100),
+    ("write 10 KB", "write('" + "x" * 10 * KB + "')", 1000),
+    ("write 10 KB ;()", "write('" + "a;(b)," * (10 * KB // 6) + "')", 1000),
+    ("escapes 10 KB", "write('" + "\\'" * (5 * KB) + "')", 200),
+    ("syntax error 10 KB", "write('" + "x" * 10 * KB + "') x", 1000),
+]
+
+
+def report(name, size, loops, seconds):
+    """Print the result of one measurement"""
+    per_call = seconds / loops
+    print(
+        f"{name:<20} {size:>7} chars {per_call * 1e6:>10.1f} us/call"
+        f" {size / per_call / 1e6:>8.1f} MB/s"
+    )
+
+
+def bench(execute=False):
+    """Compile (and execute) all command lists"""
+    # bypass the cache to measure the compiler
+    compiler = compile_autogui_cmd_list.__wrapped__
+    print("compile:")
+    for name, cmds, loops in CASES:
+        report(name, len(cmds), loops, timeit.timeit(lambda c=cmds: compiler(c), number=loops))
+    print("cached compile:")
+    name, cmds, loops = CASES[0]
+    compile_autogui_cmd_list(cmds)
+    report(name, len(cmds), loops, timeit.timeit(lambda: compile_autogui_cmd_list(cmds), number=loops))
+    if execute is True:
+        # wait() would sleep, so replace it by a click
+        print("execute:")
+        for name, cmds, loops in CASES:
+            err, program = compiler(cmds.replace("wait(1000)", "click()"))
+            if err != "OK":
+                continue
+            start = time.perf_counter()
+            for _ in range(loops):
+                run_autogui_program(program)
+            report(name, len(cmds), loops, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    bench("-e" in sys.argv)
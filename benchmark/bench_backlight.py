@@ -0,0 +1,82 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Micro benchmark of the backlight backends: shell commands against
+direct access to the (sysfs) attribute file.
+
+A temporary directory is used as fake sysfs backlight directory, so the
+benchmark runs on every system. Call with the display ID as parameter to
+measure the real sysfs files (read only).
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+# import test object
+sys.path.append(os.path.abspath("./"))
+from backlight_api import ShellAttribute, SysfsAttribute # pylint: disable=wrong-import-position
+
+#
+# global constants
+#
+GET_CMD = "cat {path}"
+SET_CMD = "echo {value} > {path}"
+LOOPS_SHELL = 200
+LOOPS_SYSFS = 20000
+
+
+def report(name, loops, seconds):
+    """Print the result of one measurement"""
+    print(f"{name:<22} {loops:>7} calls {seconds / loops * 1e6:>10.1f} us/call")
+
+
+def bench(path, writable=True):
+    """Compare read (and write) of both backends"""
+    shell = ShellAttribute(
+        GET_CMD.format(path=path), SET_CMD.replace("{path}", path), None
+    )
+    sysfs = SysfsAttribute(path, shell)
+    print(f"File: {path}")
+    report("shell read", LOOPS_SHELL, timeit.timeit(shell.read, number=LOOPS_SHELL))
+    report("sysfs read", LOOPS_SYSFS, timeit.timeit(sysfs.read, number=LOOPS_SYSFS))
+    if writable is True:
+        report(
+            "shell write",
+            LOOPS_SHELL,
+            timeit.timeit(lambda: shell.write(15), number=LOOPS_SHELL),
+        )
+        report(
+            "sysfs write",
+            LOOPS_SYSFS,
+            timeit.timeit(lambda: sysfs.write(15), number=LOOPS_SYSFS),
+        )
+    sysfs.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        bench(f"/sys/class/backlight/{sys.argv[1]}/brightness", writable=False)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            fake = os.path.join(directory, "brightness")
+            with open(fake, "w", encoding="utf-8") as f:
+                f.write("31\n")
+            bench(fake)
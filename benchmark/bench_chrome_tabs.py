@@ -0,0 +1,89 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Latency of opening and activating chrome tabs: calling chromium with the url
+against DevTools Target.createTarget/activateTarget.
+
+This benchmark needs a running chromium with --remote-debugging-port.
+Call it on the kiosk display with the DevTools port as optional parameter.
+All tabs opened by the benchmark are closed again.
+"""
+
+import os
+import sys
+import time
+import requests
+
+# import test object
+sys.path.append(os.path.abspath("./"))
+from chrome_tab_api import ChromeTabAPI, REQ_TIMEOUT # pylint: disable=wrong-import-position
+
+#
+# global constants
+#
+LOOPS = 5
+URL = "about:blank#bench{loop}"
+
+
+def measure(name, func):
+    """Call func LOOPS times and print the latency"""
+    latencies = []
+    ids = []
+    for loop in range(LOOPS):
+        start = time.perf_counter()
+        ids.append(func(loop))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(
+        f"{name:<26} min {latencies[0] * 1000:>8.1f} ms"
+        f"   median {latencies[len(latencies) // 2] * 1000:>8.1f} ms"
+        f"   max {latencies[-1] * 1000:>8.1f} ms"
+    )
+    return ids
+
+
+def activate_http(api, tab):
+    """Old path: activate over the HTTP endpoint and read the tab list again"""
+    requests.get(api.host + "/json/activate/" + tab.id(), timeout=REQ_TIMEOUT)
+    api.sync()
+    return tab.id()
+
+
+def close_all(api, ids):
+    """Close all tabs opened by the benchmark"""
+    api.sync()
+    for tab_id in ids:
+        if tab_id in api.tabs():
+            api.close_tab(api.tabs()[tab_id])
+
+
+if __name__ == "__main__":
+    port = sys.argv[1] if len(sys.argv) > 1 else 9222
+    API = ChromeTabAPI(port=port)
+    API.set_log("WARNING", None)
+    if API.sync() is False:
+        sys.exit("No chrome DevTools API on port " + str(port))
+    home = API.active()
+
+    IDS = measure("new tab: chromium", lambda loop: API.new_tab_chromium(URL.format(loop=loop)))
+    close_all(API, IDS)
+    IDS = measure("new tab: createTarget", lambda loop: API.new_tab(URL.format(loop=loop)))
+    measure("activate: /json/activate", lambda loop: activate_http(API, home))
+    measure("activate: activateTarget", lambda loop: API.bring_to_front(home))
+    close_all(API, IDS)
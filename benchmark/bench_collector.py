@@ -0,0 +1,88 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Benchmark of the per sample cost of the /proc metrics collector.
+
+Compares the collector, which keeps the /proc files open and reads them
+with pread, with re-opening the files for every sample and with starting
+a tool process (free) for the memory values.
+"""
+
+import os
+import subprocess
+import sys
+import time
+import timeit
+
+# import test object
+sys.path.append(os.path.abspath("./"))
+from proc_collector import ProcCollector # pylint: disable=wrong-import-position
+
+#
+# global constants
+#
+LOOPS = 5000
+SPAWN_LOOPS = 100
+FILES = ("/proc/meminfo", "/proc/uptime", "/proc/net/dev")
+
+
+def reopen():
+    """Read the /proc files with open() and parse the text"""
+    values = {}
+    for path in FILES:
+        with open(path, "r", encoding="utf-8") as file:
+            text = file.read()
+        for line in text.splitlines():
+            if line.startswith("MemAvailable:"):
+                values["mem_available"] = int(line.split()[1]) / 1024
+            elif line.startswith("SwapFree:"):
+                values["swap_free"] = int(line.split()[1]) / 1024
+        if path.endswith("uptime"):
+            values["uptime"] = float(text.split()[0])
+    stat = os.statvfs("/")
+    values["disk_free"] = stat.f_bavail * stat.f_frsize / 1024 / 1024
+    return values
+
+
+def spawn():
+    """Read the memory with the tool free"""
+    return subprocess.run(["free", "-m"], capture_output=True, check=False).stdout
+
+
+def report(name, loops, seconds):
+    """Print the result of one measurement"""
+    print(f"{name:<24} {seconds / loops * 1e6:>10.1f} us/sample")
+
+
+def bench():
+    """Measure the cost of one sample"""
+    collector = ProcCollector()
+    collector.collect()
+    print(f"metrics: {', '.join(sorted(collector.values))}")
+    print(f"chromium processes: {len(collector.chromium)}")
+    report("collector (pread)", LOOPS, timeit.timeit(collector.collect, number=LOOPS))
+    report("re-open files", LOOPS, timeit.timeit(reopen, number=LOOPS))
+    start = time.perf_counter()
+    for _ in range(SPAWN_LOOPS):
+        spawn()
+    report("spawn free", SPAWN_LOOPS, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,84 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Benchmark of the brightness writes.
+
+Compares the writes per second of the kept open sysfs attribute with the
+shell command which forks for every value. A temporary file replaces the
+sysfs file, so the benchmark runs without a display. At the end a
+transition is ramped with the BrightnessActuator and the written frames
+are counted.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# import test object
+sys.path.append(os.path.abspath("./"))
+from backlight_api import SysfsAttribute, ShellAttribute, BrightnessActuator # pylint: disable=wrong-import-position
+
+#
+# global constants
+#
+SYSFS_WRITES = 20000
+SHELL_WRITES = 100
+TRANSITION = 1.0  # seconds
+FRAME_RATE = 50
+
+
+def writes_per_second(attribute, loops):
+    """Write loops values and return the writes per second"""
+    start = time.perf_counter()
+    for value in range(loops):
+        attribute.write(value % 256)
+    return loops / (time.perf_counter() - start)
+
+
+def bench():
+    """Measure the writes per second and a transition"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "brightness")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("0\n")
+        shell = ShellAttribute(f"cat {path}", f"echo {{value}} > {path}", "bench")
+        sysfs = SysfsAttribute(path, shell)
+        print(f"sysfs file:    {writes_per_second(sysfs, SYSFS_WRITES):>10.0f} writes/s")
+        print(f"shell command: {writes_per_second(shell, SHELL_WRITES):>10.0f} writes/s")
+
+        sysfs.write(0)
+        done = []
+        actuator = BrightnessActuator(sysfs, 0, lambda: done.append(time.monotonic()), FRAME_RATE)
+        actuator.start()
+        start = time.monotonic()
+        actuator.set(255, TRANSITION)
+        while not done:
+            time.sleep(0.01)
+        stats = actuator.statistics()
+        print(
+            f"transition:    {stats['frames']} frames in {done[0] - start:.3f} s"
+            f" (expected {round(TRANSITION * FRAME_RATE)} in {TRANSITION:.3f} s),"
+            f" final value {sysfs.read()[1]}"
+        )
+        sysfs.close()
+
+
+if __name__ == "__main__":
+    bench()
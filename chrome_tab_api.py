@@ -20,43 +20,206 @@
 over the DevTools API
 """
 
+import itertools
 import json
 import logging
 import subprocess
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
 import requests
+from requests.adapters import HTTPAdapter
 from websockets.sync.client import connect
+from websockets.exceptions import WebSocketException
 
 #
 # global constants
 #
 REQ_TIMEOUT = 4 #wait 4 seconds for requests
-CMD_CHROMIUM = "chromium "
+REQ_CONNECT_TIMEOUT = 1 #wait 1 second for the connection of a request
+CMD_CHROMIUM = "chromium"
+DEFAULT_PORTS = {"http": 80, "https": 443}
+BLANK_URLS = ("", "about:blank")  # urls of a tab before a page is loaded
+
+
+def normalize_url(url, keep_fragment=True):
+    """
+    Returns the url in a normalized form to compare urls:
+    scheme and host in lower case, without default port, without trailing
+    slash and without empty fragment (without any fragment if keep_fragment is False)
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+    # user info and the brackets of IPv6 addresses are kept
+    userinfo, at, host = parts.netloc.rpartition("@")
+    if port is not None or host.endswith(":"):
+        host = host[: host.rfind(":")]
+    host = host.lower()
+    if port is not None and DEFAULT_PORTS.get(parts.scheme.lower()) != port:
+        host += f":{port}"
+    netloc = userinfo + at + host
+    fragment = parts.fragment if keep_fragment is True else ""
+    return urlunsplit(
+        (parts.scheme.lower(), netloc, parts.path.rstrip("/"), parts.query, fragment)
+    )
+
+
+class DevToolsConnection:
+    """
+    Persistent websocket connection to one DevTools target.
+    Requests get unique ids and a reader thread matches the responses
+    to the requests by id. Messages without id are events and are
+    passed to the registered listeners.
+    """
+
+    def __init__(self, adr, ids, log):
+        """Create connection data. The websocket is opened with the first call"""
+        self.adr = adr
+        self.ids = ids  # shared counter for request ids
+        self.log = log
+        self.ws = None
+        self.lock = threading.Lock()
+        self.pending = {}  # dictionary with open requests: Key: id, Value: [Event, response]
+        self.listeners = []  # call backs for events: listener(message)
+
+    def add_listener(self, listener):
+        """Add a call back which is called with every received event"""
+        self.listeners.append(listener)
+
+    def connected(self):
+        """Returns True if the websocket is open"""
+        return self.ws is not None
+
+    def _open(self):
+        """Open the websocket and start the reader thread. Lock must be held"""
+        self.ws = connect(self.adr, open_timeout=REQ_TIMEOUT, max_size=None)
+        thread = threading.Thread(
+            target=self._reader, args=(self.ws,), name="DevToolsReader", daemon=True
+        )
+        thread.start()
+        self.log.debug("DevTools connection opened: %s", self.adr)
+
+    def _reader(self, ws):
+        """Thread which receives all messages of the websocket"""
+        try:
+            for message in ws:
+                message = json.loads(message)
+                if "id" in message:
+                    with self.lock:
+                        waiter = self.pending.pop(message["id"], None)
+                    if waiter is not None:
+                        waiter[1] = message
+                        waiter[0].set()
+                else:
+                    for listener in self.listeners:
+                        try:
+                            listener(message)
+                        except Exception as error: # pylint: disable=broad-exception-caught
+                            self.log.error("DevTools listener error %s: %s", self.adr, error)
+        except (WebSocketException, OSError, ValueError) as error:
+            self.log.debug("DevTools connection error %s: %s", self.adr, error)
+        # connection is closed: wake up all waiting requests
+        with self.lock:
+            if self.ws is ws:
+                self.ws = None
+            pending = self.pending
+            self.pending = {}
+        for waiter in pending.values():
+            waiter[0].set()
+        self.log.debug("DevTools connection closed: %s", self.adr)
+
+    def call(self, method, params, timeout=REQ_TIMEOUT):
+        """
+        Send a command and wait for the response.
+        A closed connection is opened again once. Returns the response
+        dictionary or None on error or timeout.
+        """
+        for _ in range(2):
+            waiter = [threading.Event(), None]
+            try:
+                with self.lock:
+                    if self.ws is None:
+                        self._open()
+                    request_id = next(self.ids)
+                    self.pending[request_id] = waiter
+                    self.ws.send(
+                        json.dumps({"id": request_id, "method": method, "params": params})
+                    )
+            except (WebSocketException, OSError) as error:
+                self.log.warning("DevTools call %s failed: %s", method, error)
+                self.close()
+                continue
+            if waiter[0].wait(timeout) is False:
+                with self.lock:
+                    self.pending.pop(request_id, None)
+                self.log.warning("DevTools call %s timed out", method)
+                return None
+            if waiter[1] is not None:
+                return waiter[1]
+            # connection was closed before the response was received: retry
+        return None
+
+    def close(self):
+        """Close the websocket"""
+        with self.lock:
+            ws = self.ws
+            self.ws = None
+        if ws is not None:
+            ws.close()
+
+
+class DevToolsPool:
+    """
+    Pool of persistent DevTools connections. Key is the webSocketDebuggerUrl
+    """
+
+    def __init__(self):
+        """Create empty pool"""
+        self.ids = itertools.count(1)
+        self.connections = {}
+        self.lock = threading.Lock()
+        self.log = logging.getLogger("ChromeTabApi")
+
+    def get(self, adr):
+        """Returns the connection to this address"""
+        with self.lock:
+            if adr not in self.connections:
+                self.connections[adr] = DevToolsConnection(adr, self.ids, self.log)
+            return self.connections[adr]
+
+    def close(self, adr):
+        """Close and remove the connection to this address"""
+        with self.lock:
+            connection = self.connections.pop(adr, None)
+        if connection is not None:
+            connection.close()
+
+    def count(self):
+        """Returns the number of open connections"""
+        return sum(1 for c in list(self.connections.values()) if c.connected())
+
+
+# all DevTools calls share this pool
+DEVTOOLS_POOL = DevToolsPool()
 
 
 class DevToolsAPI:
     """Class to make API websocket calls"""
 
-    def __init__(self, api_id, domain):
+    def __init__(self, domain, pool=DEVTOOLS_POOL):
         """Create DevTools interface for a specific domain"""
-        self._id = api_id
         self._domain = domain + "."
+        self._pool = pool
 
     def call_api(self, adr, command, params):
-        """Makes an websocket api call"""
-        payload = {}
-        payload["id"] = self._id
-        payload["method"] = self._domain + command
-        payload["params"] = params
-        payload = json.dumps(payload)
-
-        with connect(adr) as ws:
-            ws.send(payload)
-            r = ws.recv()
-            return r
-
-    def set_id( self, api_id ):
-        """Set API ID"""
-        self._id = api_id
+        """
+        Makes an websocket api call over a persistent connection.
+        Returns the response or None on error
+        """
+        return self._pool.get(adr).call(self._domain + command, params)
 
     def set_domain( self, domain ):
         """Set domain"""
@@ -70,7 +233,7 @@ class ChromeTab:
     def __init__(self, tab):
         """Create class data"""
         self.t = tab
-        self.api = DevToolsAPI(2, "Page")
+        self.api = DevToolsAPI("Page")
 
     def id(self):
         """retuns the tab id"""
@@ -116,6 +279,7 @@ class ChromeTabAPI: #pylint: disable=too-many-instance-attributes
         host="http://localhost:"
     ):
         """Create class default values"""
+        self.lock = threading.RLock()  # protects the registry against the DevTools event thread
         self.time_tick = time_tick
         self.port = port
         self.page_timeout = timeouts[0]
@@ -124,11 +288,31 @@ class ChromeTabAPI: #pylint: disable=too-many-instance-attributes
         self.host = host + str(port)
         self.tabs_by_id = {}
         self.tabs_life_counters = {}
+        self.tabs_by_url = {}
         self.clear_registry()
+        self.keep_fragment = True  # fragment of urls is used to find tabs
+        self.redirects = {}  # known redirects: Key: normalized url, Value: normalized target url
+        self.requested_urls = {}  # url of new tabs before loading: Key: id, Value: normalized url
+        self.panels = {}  # configured panels: Key: name, Value: panel
+        self.panels_by_url = {}  # Key: normalized url, Value: panel name
         self.focus_tab = None
         self.focus_reload = 0
         self.reload_callback = None
+        self.change_callback = None  # called when an event changed the tabs
         self.sync_error = False
+        self.target_events = False  # registry is updated by DevTools Target events
+        self.events_ready = False  # initial sync after subscription of the events is done
+        self.browser = None  # DevTools connection to the browser target
+        # keep alive HTTP session for the DevTools JSON endpoints
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.http_stats = {
+            "requests": 0,
+            "failures": 0,
+            "last_ms": 0.0,
+            "avg_ms": 0.0,
+            "max_ms": 0.0,
+        }
         #
         # initialize logger
         #
@@ -139,6 +323,13 @@ class ChromeTabAPI: #pylint: disable=too-many-instance-attributes
         """Set a callback which is called on relad page"""
         self.reload_callback = callback
 
+    def set_change_callback(self, callback):
+        """
+        Set a callback which is called when a DevTools event changed the tabs
+        (called by the reader thread of the browser connection)
+        """
+        self.change_callback = callback
+
     def set_log(self, level, handler):
         """configure logger"""
         self.log.setLevel(level)
@@ -147,7 +338,164 @@ class ChromeTabAPI: #pylint: disable=too-many-instance-attributes
 
     def tab_count(self):
         """Return number of tabs in registry"""
-        return len(self.tabs_by_id)
+        with self.lock:
+            return len(self.tabs_by_id)
+
+    def http_get(self, path):
+        """
+        GET request to the DevTools JSON endpoint over the keep alive session.
+        Raises requests.exceptions.RequestException on error
+        """
+        start = time.perf_counter()
+        try:
+            r = self.session.get(self.host + path, timeout=(REQ_CONNECT_TIMEOUT, REQ_TIMEOUT))
+        except requests.exceptions.RequestException:
+            self.count_request(start, False)
+            raise
+        self.count_request(start, r.status_code == 200)
+        return r
+
+    def count_request(self, start, success):
+        """Update the request statistic"""
+        latency = (time.perf_counter() - start) * 1000
+        # requests are made by the publish and the mqtt thread
+        with self.lock:
+            stats = self.http_stats
+            stats["requests"] += 1
+            if success is False:
+                stats["failures"] += 1
+            stats["last_ms"] = round(latency, 1)
+            stats["avg_ms"] = round(
+                stats["avg_ms"] + (latency - stats["avg_ms"]) / stats["requests"], 1
+            )
+            stats["max_ms"] = round(max(stats["max_ms"], latency), 1)
+
+    def http_statistics(self):
+        """Returns the statistic of the DevTools HTTP requests"""
+        with self.lock:
+            stats = dict(self.http_stats)
+        stats["devtools_connections"] = DEVTOOLS_POOL.count()
+        return stats
+
+    def enable_target_events(self):
+        """
+        Attach to the browser DevTools endpoint and subscribe to the Target
+        events. The registry is then updated by the events and the HTTP
+        snapshot is only needed at startup and for resyncs.
+        Returns False if the subscription failed.
+        """
+        self.target_events = True
+        self.events_ready = False
+        if self.browser_connection() is None:
+            return False
+        response = self.browser.call("Target.setDiscoverTargets", {"discover": True})
+        if response is None or "error" in response:
+            self.log.warning("Subscription of target events failed: %s", response)
+            return False
+        self.log.info("Subscribed to DevTools target events: %s", self.browser.adr)
+        # initial snapshot (focus tab is only known by the HTTP snapshot)
+        self.sync()
+        self.events_ready = True
+        return True
+
+    def browser_connection(self):
+        """
+        Returns the DevTools connection to the browser target.
+        The address is requested again if the connection is closed.
+        Returns None if the browser endpoint is not available.
+        """
+        if self.browser is not None and self.browser.connected():
+            return self.browser
+        try:
+            r = self.http_get("/json/version")
+            adr = r.json()["webSocketDebuggerUrl"]
+        except (requests.exceptions.RequestException, ValueError, KeyError) as error:
+            self.log.warning("Browser DevTools endpoint not available: %s", error)
+            return None
+        browser = DEVTOOLS_POOL.get(adr)
+        if browser is not self.browser:
+            browser.add_listener(self.on_target_event)
+            self.browser = browser
+        return self.browser
+
+    def call_browser(self, method, params):
+        """
+        Makes a DevTools call on the browser target.
+        Returns the result or None on error
+        """
+        browser = self.browser_connection()
+        if browser is None:
+            return None
+        response = browser.call(method, params)
+        if response is None or "error" in response:
+            self.log.warning("DevTools call %s failed: %s", method, response)
+            return None
+        return response["result"]
+
+    def events_active(self):
+        """Returns True if the registry is updated by target events"""
+        return (
+            self.events_ready is True
+            and self.browser is not None
+            and self.browser.connected()
+        )
+
+    def tab_from_target(self, info):
+        """Create a tab from a DevTools TargetInfo"""
+        ws_host = self.host.replace("http://", "ws://", 1)
+        return ChromeTab(
+            {
+                "id": info["targetId"],
+                "type": info["type"],
+                "url": info["url"],
+                "webSocketDebuggerUrl": f"{ws_host}/devtools/page/{info['targetId']}",
+            }
+        )
+
+    def on_target_event(self, message):
+        """
+        Call back for DevTools events of the browser connection
+        (called by the reader thread of the connection)
+        """
+        method = message.get("method")
+        params = message.get("params", {})
+        if method in ("Target.targetCreated", "Target.targetInfoChanged"):
+            info = params["targetInfo"]
+            if info["type"] != "page":
+                return
+            with self.lock:
+                tab = self.tabs_by_id.get(info["targetId"])
+                if tab is None:
+                    tab = self.tab_from_target(info)
+                    self.register_tab(tab)
+                    self.log.info("Tab created: %s", tab.url())
+                    if self.events_ready is True:
+                        # new tabs are opened in the foreground
+                        self.set_focus_tab(tab)
+                elif tab.url() != info["url"]:
+                    self.log.info("Tab url changed: %s", info["url"])
+                    self.set_tab_url(tab, info["url"])
+                elif tab.id() in self.requested_urls:
+                    # a learned redirect can change the panel
+                    self.learn_redirect(tab)
+                else:
+                    return
+        elif method == "Target.targetDestroyed":
+            with self.lock:
+                tab = self.tabs_by_id.get(params["targetId"])
+                if tab is None:
+                    return
+                self.log.info("Tab destroyed: %s", tab.url())
+                self.deregister_tab(tab)
+                if self.focus_tab is not None and self.focus_tab.id() == tab.id():
+                    # the new tab in focus is only known by a resync
+                    self.sync_error = True
+            # the connection to a destroyed tab can not be used again
+            DEVTOOLS_POOL.close(tab.ws_url())
+        else:
+            return
+        if self.change_callback is not None:
+            self.change_callback()
 
     def active_url( self ):
         """retuns the url of the tab in focus"""
@@ -157,53 +505,100 @@ class ChromeTabAPI: #pylint: disable=too-many-instance-attributes
 
     def close_tab(self, tab):
         """Close a tab in chrome"""
-        api_url = self.host + "/json/close/"
         try:
-            r = requests.get(api_url + tab.id(), timeout=REQ_TIMEOUT)
+            r = self.http_get("/json/close/" + tab.id())
         except requests.exceptions.RequestException as error:
             self.log.warning("Request error to chrome api: %s", error)
             return False
 
         if r.status_code == 200:
             self.log.info("Close Tab: %s", tab.url())
+            DEVTOOLS_POOL.close(tab.ws_url())
             return True
         self.log.info("Could not close tab: %d", r.status_code)
         return False
 
     def new_tab(self, url):
-        """Opens a new tab"""
-        err, msg = subprocess.getstatusoutput( CMD_CHROMIUM + url)
-        if err != 0:
-            self.log.error("Error %s executing command: %s", err, msg)
-            return False
+        """
+        Opens a new tab with DevTools Target.createTarget.
+        If the browser target is not available chromium is called instead.
+        Returns the id of the new tab or None on error
+        """
+        result = self.call_browser("Target.createTarget", {"url": url})
+        if result is None:
+            return self.new_tab_chromium(url)
+        # register the new tab directly, no resync needed
+        with self.lock:
+            # a different url after loading is learned as redirect
+            self.requested_urls[result["targetId"]] = self.normalize(url)
+            tab = self.tabs_by_id.get(result["targetId"])
+            if tab is None:
+                # the url is the requested one until the first target event
+                tab = self.tab_from_target(
+                    {"targetId": result["targetId"], "type": "page", "url": url}
+                )
+                self.register_tab(tab)
+            else:
+                self.learn_redirect(tab)
+            self.set_focus_tab(tab)
+        self.log.info("New tab opened: %s", url)
+        return tab.id()
+
+    def new_tab_chromium(self, url):
+        """
+        Opens a new tab by calling chromium with the url.
+        Returns the id of the new tab or None on error
+        """
+        try:
+            r = subprocess.run(
+                [CMD_CHROMIUM, url], capture_output=True, text=True, check=False
+            )
+        except OSError as error:
+            self.log.error("Error executing command %s: %s", CMD_CHROMIUM, error)
+            return None
+        if r.returncode != 0:
+            self.log.error("Error %s executing command: %s", r.returncode, r.stderr)
+            return None
         self.sync()
-        return True
+        if self.focus_tab is None:
+            return None
+        return self.focus_tab.id()
 
     def bring_to_front(self, tab):
-        """Close a tab in chrome"""
-        api_url = self.host + "/json/activate/"
-        try:
-            r = requests.get(api_url + tab.id(), timeout=REQ_TIMEOUT)
-        except requests.exceptions.RequestException as error:
-            self.log.warning("Request error to chrome api: %s", error)
-            return False
-        if r.status_code == 200:
-            self.log.info("Tab in focus now: %s", tab.url())
+        """
+        Puts a tab in focus with DevTools Target.activateTarget.
+        If the browser target is not available the HTTP endpoint is used.
+        """
+        if self.call_browser("Target.activateTarget", {"targetId": tab.id()}) is None:
+            try:
+                r = self.http_get("/json/activate/" + tab.id())
+            except requests.exceptions.RequestException as error:
+                self.log.warning("Request error to chrome api: %s", error)
+                return False
+            if r.status_code != 200:
+                self.log.info("Could not put tab in focus: %d", r.status_code)
+                return False
+        self.log.info("Tab in focus now: %s", tab.url())
+        if self.events_active() is True:
+            with self.lock:
+                self.set_focus_tab(tab)
+        else:
             self.sync()
-            return True
-        self.log.info("Could not put tab in focus: %d", r.status_code)
-        return False
+        return True
 
     def activate_tab(self, url):
         """Check if a tab with this url exist already
         if yes put it in the front
         if no open a new one with this url
+        Returns the id of the tab in focus or None on error
         """
         self.log.info("Activate tab with url: %s", url)
         tab = self.get_tab_by_url(url)
         if tab is not None:
             self.log.info("Tab with this url exists, bring it to the front: %s", tab.url())
-            return self.bring_to_front(tab)
+            if self.bring_to_front(tab) is True:
+                return tab.id()
+            return None
         self.log.info("No tab with this url exists, create new tab: %s", url)
         return self.new_tab(url)
 
@@ -214,10 +609,60 @@ class ChromeTabAPI: #pylint: disable=too-many-instance-attributes
         self.tabs_life_counters = (
             {}
         )  # dictionary with tab life time: Key: Id; Value: Counter (seconds)
+        self.tabs_by_url = {}  # dictionary with tabs. Key: normalized url, Value: chrome tab
+
+    def set_url_fragments(self, keep_fragment):
+        """Defines if the fragment of urls is used to find tabs and panels"""
+        self.keep_fragment = keep_fragment
+
+    def normalize(self, url):
+        """Returns the normalized url with the configured fragment policy"""
+        return normalize_url(url, self.keep_fragment)
+
+    def add_redirect(self, url, target):
+        """Add a known redirect from url to target url"""
+        url = self.normalize(url)
+        target = self.normalize(target)
+        if url == target:
+            return
+        self.log.info("Redirect learned: %s -> %s", url, target)
+        self.redirects[url] = target
+        if url in self.panels_by_url and target not in self.panels_by_url:
+            self.panels_by_url[target] = self.panels_by_url[url]
+
+    def set_panels(self, panels):
+        """
+        Defines the configured panel table (Key: name, Value: panel)
+        and creates the index to find a panel by url
+        """
+        with self.lock:
+            self.panels = panels
+            self.panels_by_url = {}
+            for name, panel in self.panels.items():
+                # first panel with an url wins
+                self.panels_by_url.setdefault(panel.normalized_url, name)
+            for url, target in self.redirects.items():
+                if url in self.panels_by_url:
+                    self.panels_by_url.setdefault(target, self.panels_by_url[url])
+
+    def panel_by_url(self, url):
+        """Returns the name of the panel with this url or None"""
+        url = self.normalize(url)
+        return self.panels_by_url.get(self.redirects.get(url, url))
+
+    def active_panel(self):
+        """Returns the name of the panel in focus or None"""
+        if self.focus_tab is None:
+            return None
+        return self.panel_by_url(self.focus_tab.url())
 
     def tabs(self):
-        """returns the currently open tabs"""
-        return self.tabs_by_id
+        """
+        returns a copy of the currently open tabs
+        (the registry is changed by the DevTools event thread)
+        """
+        with self.lock:
+            return dict(self.tabs_by_id)
 
     def active(self):
         """Returns the active tab"""
@@ -227,19 +672,61 @@ class ChromeTabAPI: #pylint: disable=too-many-instance-attributes
         """Puts a new tab to the dictionaries"""
         self.tabs_by_id[tab.id()] = tab
         self.tabs_life_counters[tab.id()] = self.page_timeout
+        self.index_tab(tab)
 
     def deregister_tab(self, tab):
         """Removes a new tab from the dictionaries"""
         if tab.id() in self.tabs_by_id:
             del self.tabs_by_id[tab.id()]
             del self.tabs_life_counters[tab.id()]
+            self.unindex_tab(tab)
+        self.requested_urls.pop(tab.id(), None)
+
+    def index_tab(self, tab):
+        """Puts a tab to the url index"""
+        self.tabs_by_url.setdefault(self.normalize(tab.url()), tab)
+
+    def unindex_tab(self, tab):
+        """Removes a tab from the url index"""
+        url = self.normalize(tab.url())
+        indexed = self.tabs_by_url.get(url)
+        if indexed is not None and indexed.id() == tab.id():
+            del self.tabs_by_url[url]
+            # is there another tab with the same url?
+            for other in self.tabs_by_id.values():
+                if other.id() != tab.id() and self.normalize(other.url()) == url:
+                    self.tabs_by_url[url] = other
+                    break
+
+    def set_tab_url(self, tab, url):
+        """Updates the url of a registered tab"""
+        self.unindex_tab(tab)
+        tab.t["url"] = url
+        self.index_tab(tab)
+        self.learn_redirect(tab)
+
+    def learn_redirect(self, tab):
+        """
+        A new tab which shows a different url than requested after
+        loading is redirected. This redirect is stored.
+        Only the first loaded url of a new tab is checked, later
+        navigations in the page are no redirects.
+        """
+        requested = self.requested_urls.get(tab.id())
+        if requested is None or tab.url() in BLANK_URLS:
+            return
+        del self.requested_urls[tab.id()]
+        url = self.normalize(tab.url())
+        if url != requested:
+            self.add_redirect(requested, url)
 
     def get_tab_by_url(self, url):
         """returns the tab by url from registry"""
-        for tab in self.tabs_by_id.values():
-            if tab.url() == url:
-                return tab
-        return None
+        url = self.normalize(url)
+        tab = self.tabs_by_url.get(url)
+        if tab is None and url in self.redirects:
+            tab = self.tabs_by_url.get(self.redirects[url])
+        return tab
 
     def get_timeout(self, tab):
         """returns remaining lifetime"""
@@ -264,38 +751,18 @@ class ChromeTabAPI: #pylint: disable=too-many-instance-attributes
         """
         synchronize the current status of tabs with chrome
         """
-        api_url = self.host + "/json"
         try:
-            r = requests.get(api_url, timeout=REQ_TIMEOUT)
+            r = self.http_get("/json")
         except requests.exceptions.RequestException as error:
             self.log.error("Request error to chrome api: %s", error)
             self.sync_error = True
             return False
 
         if r.status_code == 200:
-            tabs = r.json()
-            if len(tabs) > 0:
-                # first tab in list is currently shown on top. Is focus changed?
-                self.set_focus_tab(ChromeTab(tabs[0]))
-                # create a new dictionarys
-                tabs_by_id = {}
-                tabs_life_counters = {}
-                count_tabs = 0
-                for tab in tabs:
-                    tab = ChromeTab(tab)
-                    tabs_by_id[tab.id()] = tab
-                    if tab.id() not in self.tabs_life_counters:
-                        tabs_life_counters[tab.id()] = self.page_timeout
-                    else:
-                        tabs_life_counters[tab.id()] = self.tabs_life_counters[tab.id()]
-                #replace the old dicts with new one
-                self.tabs_by_id = tabs_by_id
-                self.tabs_life_counters = tabs_life_counters
-                self.sync_error = False
-            else:
-                # No open tabs returned
-                self.clear_registry()
-                self.log.warning("No tabs returnd by chrome!!")
+            # only pages are tabs (no service workers, iframes,...)
+            tabs = [tab for tab in r.json() if tab.get("type", "page") == "page"]
+            with self.lock:
+                self.update_registry(tabs)
 
             #sync complete!
             self.sync_error = False
@@ -304,8 +771,46 @@ class ChromeTabAPI: #pylint: disable=too-many-instance-attributes
         self.sync_error = True
         return False
 
-    def tick(self):
-        """Check lifetime of tabs in background. And reload cycle of tab in foreground"""
+    def update_registry(self, tabs):
+        """Replace the registry with the tabs of a HTTP snapshot"""
+        if len(tabs) > 0:
+            # create a new dictionarys
+            tabs_by_id = {}
+            tabs_life_counters = {}
+            for tab in tabs:
+                tab = ChromeTab(tab)
+                tabs_by_id[tab.id()] = tab
+                if tab.id() not in self.tabs_life_counters:
+                    tabs_life_counters[tab.id()] = self.page_timeout
+                else:
+                    tabs_life_counters[tab.id()] = self.tabs_life_counters[tab.id()]
+            #replace the old dicts with new one
+            self.tabs_by_id = tabs_by_id
+            self.tabs_life_counters = tabs_life_counters
+            self.tabs_by_url = {}
+            for tab in tabs_by_id.values():
+                self.index_tab(tab)
+                self.learn_redirect(tab)
+            for tab_id in list(self.requested_urls):
+                if tab_id not in tabs_by_id:
+                    del self.requested_urls[tab_id]
+            # first tab in list is currently shown on top. Is focus changed?
+            self.set_focus_tab(tabs_by_id[tabs[0]["id"]])
+        else:
+            # No open tabs returned
+            self.clear_registry()
+            self.log.warning("No tabs returnd by chrome!!")
+
+    def check_sync(self):
+        """
+        Subscribes again to the target events and resyncs the registry if needed.
+        Returns False if chrome is still not in sync
+        """
+        if self.target_events is True and (self.browser is None or not self.browser.connected()):
+            # connection to browser lost: subscribe again to the target events
+            self.log.debug("Subscribe again to target events")
+            if self.enable_target_events() is False:
+                self.sync_error = True
         if self.sync_error is True:
             #make retry
             self.log.debug("Retry sync with chrome!!")
@@ -313,27 +818,38 @@ class ChromeTabAPI: #pylint: disable=too-many-instance-attributes
             if self.sync_error is True:
                 self.log.error("Still chrome sync error!!")
                 #Stil no connection to chrome
-                return
+                return False
             self.log.debug("Sync did work now. Chrome is connected")
+        elif self.target_events is False and len(self.requested_urls) > 0:
+            # without events the loaded url of new tabs is only known by a snapshot
+            self.sync()
+        return True
+
+    def tick(self):
+        """Check lifetime of tabs in background. And reload cycle of tab in foreground"""
+        if self.check_sync() is False:
+            return
 
         if self.page_timeout > 0:
             # timeout function is active
             tabs_to_be_closed = []
             tab_counter = 0
-            for tab_id, counter in self.tabs_life_counters.items():
-                # do not check lifetime of tab in focus
-                if tab_id != self.focus_tab.id():
-                    tab_counter += 1
-                    counter -= self.time_tick
-                    if counter <= 0 or (self.maxTabs != 0 and tab_counter >= self.maxTabs):
-                        tab = self.tabs_by_id[tab_id]
-                        tabs_to_be_closed.append(tab)
-                    else:
-                        self.tabs_life_counters[tab_id] = counter
+            with self.lock:
+                for tab_id, counter in self.tabs_life_counters.items():
+                    # do not check lifetime of tab in focus
+                    if tab_id != self.focus_tab.id():
+                        tab_counter += 1
+                        counter -= self.time_tick
+                        if counter <= 0 or (self.maxTabs != 0 and tab_counter >= self.maxTabs):
+                            tab = self.tabs_by_id[tab_id]
+                            tabs_to_be_closed.append(tab)
+                        else:
+                            self.tabs_life_counters[tab_id] = counter
+                for tab in tabs_to_be_closed:
+                    self.deregister_tab(tab)
             #close all tabs with timeout:
             for tab in tabs_to_be_closed:
                 self.log.info("Close tab in background: %s", tab.url())
-                self.deregister_tab(tab)
                 self.close_tab(tab)
 
         if self.reload_timeout > 0:
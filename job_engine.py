@@ -0,0 +1,217 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution:
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Module implements a job engine which executes the shell commands on a
+bounded thread pool and keeps the status of all shell and autogui jobs.
+"""
+
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+#
+# global constants
+#
+DEFAULT_WORKERS = 4  # default number of threads of the pool
+DEFAULT_LIMIT = 1  # default number of parallel jobs of the same command
+JOB_HISTORY = 10  # number of finished jobs which are kept for the status
+
+# states of a job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELED = "canceled"
+
+#
+# initialize logger
+#
+LOG = logging.getLogger("JobEngine")
+logging.basicConfig()
+
+
+def job_log(level, handler):
+    """
+    set the log level of the module
+    """
+    LOG.setLevel(level)
+    if handler is not None:
+        LOG.addHandler(handler)
+
+
+class Job: # pylint: disable=too-many-instance-attributes
+    """
+    Status of a single job
+    """
+
+    def __init__(self, job_id, kind, name):
+        """Create a queued job"""
+        self.id = job_id
+        self.kind = kind  # shell or autogui
+        self.name = name
+        self.state = QUEUED
+        self.queued = time.time()
+        self.started = None
+        self.ended = None
+        self.exit_code = None
+        self.start_time = time.monotonic()  # monotonic time stamp of the last state change
+        self.delay = None  # seconds between queued and started
+        self.duration = None  # seconds between started and ended
+
+    def active(self):
+        """Returns True if the job is queued or running"""
+        return self.state in (QUEUED, RUNNING)
+
+    def status(self):
+        """Returns the status of the job as dictionary"""
+        return {
+            "id": self.id,
+            "type": self.kind,
+            "name": self.name,
+            "state": self.state,
+            "queued": round(self.queued, 3),
+            "started": None if self.started is None else round(self.started, 3),
+            "ended": None if self.ended is None else round(self.ended, 3),
+            "delay": None if self.delay is None else round(self.delay, 3),
+            "duration": None if self.duration is None else round(self.duration, 3),
+            "exit_code": self.exit_code,
+        }
+
+
+class JobEngine:
+    """
+    Creates jobs with ids and executes functions as jobs on a thread pool.
+    Jobs which are executed by other threads (e.g. the autogui worker) are
+    registered with new_job() and updated with started() and finished().
+    callback() is called on every state change of a job.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, callback=None):
+        """Create the thread pool"""
+        self.workers = workers
+        self.callback = callback
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Job")
+        self.lock = threading.Lock()
+        self.next_id = 1
+        self.jobs = {}  # active jobs: Key: id, Value: Job
+        self.history = collections.deque(maxlen=JOB_HISTORY)  # finished jobs
+        self.limits = {}  # maximal number of active jobs: Key: (kind, name), Value: limit
+        self.submitted = 0
+        self.rejected = 0
+
+    def set_limit(self, kind, name, limit):
+        """Set the maximal number of active jobs of this kind with this name"""
+        self.limits[(kind, name)] = limit
+
+    def notify(self):
+        """Inform the client about a changed job"""
+        if self.callback is not None:
+            self.callback()
+
+    def new_job(self, kind, name):
+        """
+        Register a new queued job. Returns None if the maximal number of
+        active jobs of this kind with this name is reached.
+        """
+        with self.lock:
+            limit = self.limits.get((kind, name))
+            if limit is not None:
+                count = sum(
+                    1 for job in self.jobs.values() if job.kind == kind and job.name == name
+                )
+                if count >= limit:
+                    self.rejected += 1
+                    LOG.warning("Limit of %s parallel jobs reached. Skip: %s", limit, name)
+                    return None
+            job = Job(self.next_id, kind, name)
+            self.next_id += 1
+            self.submitted += 1
+            self.jobs[job.id] = job
+        LOG.debug("Job %s queued: %s %s", job.id, kind, name)
+        self.notify()
+        return job
+
+    def started(self, job):
+        """Mark a job as running"""
+        with self.lock:
+            now = time.monotonic()
+            job.state = RUNNING
+            job.started = time.time()
+            job.delay = now - job.start_time
+            job.start_time = now
+        LOG.debug("Job %s started after %.3f s", job.id, job.delay)
+        self.notify()
+
+    def finished(self, job, exit_code, state=None):
+        """
+        Mark a job as finished. The state is derived from the exit code
+        if it is not given.
+        """
+        with self.lock:
+            if state is None:
+                state = DONE if exit_code == 0 else FAILED
+            now = time.monotonic()
+            if job.state == RUNNING:
+                job.duration = now - job.start_time
+            job.state = state
+            job.ended = time.time()
+            job.exit_code = exit_code
+            self.jobs.pop(job.id, None)
+            self.history.append(job)
+        LOG.debug("Job %s %s with exit code %s", job.id, state, exit_code)
+        self.notify()
+
+    def run_job(self, job, func, args):
+        """Execute the function of a job in a thread of the pool"""
+        self.started(job)
+        exit_code = 1
+        try:
+            exit_code = func(*args)
+        except Exception as error: # pylint: disable=broad-exception-caught
+            LOG.error("Job %s terminated with exception: %s", job.id, error)
+        self.finished(job, exit_code)
+
+    def submit(self, kind, name, func, *args):
+        """
+        Execute func(*args) as job in the thread pool. func returns the exit code.
+        Returns the job or None if the limit of the job name is reached.
+        """
+        job = self.new_job(kind, name)
+        if job is not None:
+            self.pool.submit(self.run_job, job, func, args)
+        return job
+
+    def active(self, kind):
+        """Returns the names of the queued and running jobs of this kind"""
+        with self.lock:
+            return [job.name for job in self.jobs.values() if job.kind == kind]
+
+    def status(self):
+        """Returns the status of the engine and the jobs as dictionary"""
+        with self.lock:
+            jobs = list(self.history) + list(self.jobs.values())
+            return {
+                "workers": self.workers,
+                "queued": sum(1 for job in self.jobs.values() if job.state == QUEUED),
+                "running": sum(1 for job in self.jobs.values() if job.state == RUNNING),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "jobs": [job.status() for job in jobs],
+            }
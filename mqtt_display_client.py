@@ -22,16 +22,22 @@ Module implements a MQTT client for FullPageOS
 
 import configparser
 import json
+import math
 import subprocess
-import threading
 import os
 import signal
 import sys
 
 # used to validate URLs:
 import validators
-import gpiozero
 from chrome_tab_api import ChromeTabAPI
+from backlight_api import create_attribute, backlight_log, BacklightWatcher
+from backlight_api import BrightnessActuator, DEFAULT_WINDOW, DEFAULT_FRAME_RATE, MAX_TRANSITION
+from panel_table import create_panel_table
+from job_engine import JobEngine, job_log, DEFAULT_WORKERS, DEFAULT_LIMIT, CANCELED
+from system_sampler import sampler_log
+from proc_collector import collector_log
+from system_metrics import create_sampler, METRIC_DIGITS
 from base_mqtt_client import base_mqtt_client as BMC
 
 #
@@ -46,6 +52,7 @@ PANEL_BLANK_URL = "about:blank"  # URL of the blank web page
 PANEL_BLANK = "BLANK" #show a blank panel
 PANEL_RELOAD = "RELOAD" #reload current panel
 IDLE = ">_"
+MAX_JOBS = ".maxjobs" # key suffix of the job limit of a shell command
 LOG_ROTATE_WHEN='midnight'
 LOG_BACKUP_COUNT=5
 LOG_FILE_PATH="log"
@@ -80,7 +87,8 @@ if PYAUTOGUI:
     import pyautogui
 
     # local imports:
-    from autogui_commands import call_autogui_cmd_list, autogui_log
+    from autogui_commands import compile_autogui_cmd_list, autogui_log
+    from autogui_commands import AutoguiWorker, POLICIES, POLICY_QUEUE, POLICY_PREEMPT
 
 #
 # define main class
@@ -95,39 +103,59 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
         """
         # other global attributes
         self.default_url_file = None  # default FullPageOS config file for url
+        self.default_url = None  # default url of FullPageOS
         self.display_id = None  # Touch display ID
-        self.brightness = -1  # display brightness which was last published
         self.backlight = None  # backlight status
-        self.backlight_published = None  # backlight status which was last published
-        self.published_url = None  # url which was last published to broker
+        self.backlight_watcher = None  # thread which waits for sysfs change notifications
+        self.brightness_actuator = None  # thread which writes the latest brightness value
         self.autogui_feedback = "OK"  # feedback on last macro call
-        self.autogui_feedback_published = (
-            None  # last pubished    feedback on last macro call
-        )
         self.autogui_commands = (
             None  # commands which will be performt when current website is loaded
         )
+        self.autogui_worker = None  # thread which executes the autogui commands
+        self.autogui_policy = None  # policy for autogui commands received over mqtt
+        self.autogui_panel_policy = None  # policy for autogui commands of panels
         self.current_panel = PANEL_DEFAULT  # Panel which is currently shown
-        self.current_panel_published = None  # Panel which was last publised to broker
         self.reserved_panel_names = [PANEL_DEFAULT, PANEL_SHOW_URL, PANEL_BLANK, PANEL_RELOAD]
-        self.shell_cmd = IDLE
-        self.published_shell_cmd = None
+        self.shown_url = None  # url which was last set over the url topic (panel URL)
+        self.jobs = None  # job engine which executes shell commands and tracks all jobs
+        self.system_sampler = None  # thread which samples the system metrics
+        self.proc_collector = None  # reads the metrics of /proc and statvfs
+        self.samples_request = None  # metric which samples are requested over mqtt
         #chrome api attributes
         self.chrome_pages = None
         self.chrome_port = 9222
         self.chrome_tab_timeout = 600
         self.chrome_reload_timeout = 3600
+        self.chrome_max_tabs = 0
         self.chrome_topic = False
 
         # Global config:
         BMC.BaseMqttClient.__init__(self, config_file)
 
-        #read default config of FullPageOS
-        self.read_default_url()
-        #after default url of FullPageOS is known add it to topic config
-        self.topic_config["panel"]["panels"][PANEL_DEFAULT] = self.default_url
-        self.topic_config["panel"]["panels"][PANEL_SHOW_URL] = self.default_url
-        self.topic_config["panel"]["panels"][PANEL_BLANK] = PANEL_BLANK_URL
+    def read_panels( self, config ):
+        """
+        Creates the panel table from the [panels] section and the builtin panels.
+        Autogui commands of the panels are checked here.
+        """
+        builtin = {
+            PANEL_DEFAULT: self.default_url,
+            PANEL_SHOW_URL: self.default_url,
+            PANEL_BLANK: PANEL_BLANK_URL,
+        }
+        return create_panel_table(
+            config.items("panels"),
+            self.reserved_panel_names,
+            builtin,
+            self.chrome_pages.normalize,
+            self.compile_panel_cmds if PYAUTOGUI is True else None,
+        )
+
+    def compile_panel_cmds( self, cmds ):
+        """
+        Compiles the autogui commands of a panel. Returns (err, program)
+        """
+        return compile_autogui_cmd_list(cmds) # pylint: disable=possibly-used-before-assignment
 
     def init_chrome_api( self, config ):
         """Chreate to class for the chrome api"""
@@ -144,7 +172,15 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
         except (KeyError, ValueError):
             self.chrome_max_tabs = 0
             self.log.warning("maxTabs in [chrome] section not specified. Set to 0." )
-        
+
+        target_events = False
+        keep_fragment = True
+        if "chrome" in config:
+            if "targetEvents" in config["chrome"]:
+                target_events = config["chrome"]["targetEvents"].lower() == "true"
+            if "urlFragments" in config["chrome"]:
+                keep_fragment = config["chrome"]["urlFragments"].lower() != "ignore"
+
         self.chrome_pages = ChromeTabAPI(
             self.publish_delay,
             self.chrome_port,
@@ -152,8 +188,73 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
             self.chrome_max_tabs
         )
         self.chrome_pages.set_log(self.log_level, self.log_file_handler)
-        self.chrome_pages.sync()
+        self.chrome_pages.set_url_fragments(keep_fragment)
+        if target_events is False or self.chrome_pages.enable_target_events() is False:
+            self.chrome_pages.sync()
         self.chrome_pages.set_reload_callback( self.autogui_panel_cmds )
+        self.chrome_pages.set_change_callback( self.tabs_changed )
+
+    def tabs_changed( self ):
+        """
+        Publish url and panel immediately when a DevTools event changed the tabs
+        """
+        self.publish_now("url")
+        self.publish_now("panel")
+
+    def init_backlight_watcher( self, config ):
+        """
+        Start a thread which publishes brightness and backlight immediately
+        when the kernel notifies a change. Polling is then only the fallback
+        with the full publish cycle.
+        """
+        self.backlight_watcher = BacklightWatcher(self.backlight_changed)
+        for key in ("brightness", "backlight"):
+            if "notify" in config[key]:
+                path = config[key]["notify"].format(displayID=self.display_id)
+                if self.backlight_watcher.add(key, path) is True:
+                    # polling only as fallback with the full publish cycle
+                    interval = self.publish_delay * self.full_publish_cycle
+                    self.topic_config[key]["interval"] = interval
+        if "notify" in config["brightness"] and "notify" in config["backlight"]:
+            self.topic_config["light"]["interval"] = self.topic_config["brightness"].get(
+                "interval", self.publish_delay
+            )
+        if self.backlight_watcher.count() > 0:
+            self.backlight_watcher.start()
+        else:
+            self.backlight_watcher = None
+
+    def backlight_changed( self, key ):
+        """
+        Publish the changed brightness or backlight and the light topic immediately
+        """
+        self.publish_now(key)
+        self.publish_now("light")
+
+    def init_brightness_actuator( self, config ):
+        """
+        Start the thread which writes the brightness. Commands which are received
+        within the configured window are coalesced to the latest value.
+        Transitions are written with the configured frame rate.
+        """
+        window = DEFAULT_WINDOW
+        frame_rate = DEFAULT_FRAME_RATE
+        try:
+            if "window" in config["brightness"]:
+                window = float(config["brightness"]["window"])
+            if "frameRate" in config["brightness"]:
+                frame_rate = float(config["brightness"]["frameRate"])
+        except ValueError as error:
+            raise RuntimeError(f"[brightness] section: {error}") from error
+        if frame_rate <= 0:
+            raise RuntimeError(f"frameRate in [brightness] section must be positive: {frame_rate}")
+        self.brightness_actuator = BrightnessActuator(
+            self.topic_config["brightness"]["attribute"],
+            window,
+            lambda: self.backlight_changed("brightness"),
+            frame_rate,
+        )
+        self.brightness_actuator.start()
 
     def read_client_config(self, config):
         """
@@ -171,11 +272,22 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
                 "publish": self._publish_backlight,
                 "set": self._set_backlight,
             },
+            "light": {
+                "topic": "light",
+                "publish": self._publish_light,
+                "set": self._set_light,
+            },
             "system": {"topic": "system", "publish": self._publish_system},
+            "samples": {
+                "topic": "samples",
+                "publish": self._publish_samples,
+                "set": self._set_samples,
+            },
             "shell": {
                 "topic": "shell",
                 "publish": self._publish_shell_cmd,
                 "set": self._set_shell_cmd,
+                "coalesce": False,
             },
             "url": {"topic": "url", "publish": self._publish_url, "set": self._set_url},
             "panel": {
@@ -187,15 +299,24 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
                 "topic": "autogui",
                 "publish": self._publish_autogui_results,
                 "set": self._set_autogui,
+                "coalesce": False,
             },
+            "jobs": {"topic": "jobs", "publish": self._publish_jobs},
             "chrome": {"topic": "chrome", "publish": self._publish_chrome},
         }
 
         # read ini file values
         try:
+            # create the job engine
+            self.init_job_engine(config)
+
+            # start sampling of the system metrics
+            self.init_system_sampler(config)
+
             # set loglevel of autogui
             if PYAUTOGUI is True:
                 autogui_log(self.log_level, self.log_file_handler) #pylint: disable=possibly-used-before-assignment
+                self.init_autogui_worker(config)
 
             # read server config
             self.display_id = config["global"]["displayID"]
@@ -213,10 +334,28 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
             self.topic_config["backlight"]["cmd"] = config["backlight"]["set"]
             self.topic_config["backlight"]["get"] = config["backlight"]["get"]
 
+            # open the sysfs files of brightness and backlight (shell commands as fallback)
+            if BACKLIGHT is True:
+                backlight_log(self.log_level, self.log_file_handler)
+                for key in ("brightness", "backlight"):
+                    self.topic_config[key]["attribute"] = create_attribute(
+                        config[key].get("file"),
+                        self.topic_config[key]["get"],
+                        self.topic_config[key]["cmd"],
+                        self.display_id,
+                    )
+                self.init_backlight_watcher(config)
+                self.init_brightness_actuator(config)
+
             # read config system commands
             self.topic_config["shell"]["commands"] = {}
+            limits = {}
             for key, cmd in config.items("shellCommands"):
-                self.topic_config["shell"]["commands"][key.upper()] = cmd
+                if key.endswith(MAX_JOBS):
+                    limits[key[: -len(MAX_JOBS)].upper()] = cmd
+                else:
+                    self.topic_config["shell"]["commands"][key.upper()] = cmd
+            self.read_job_limits(limits)
 
             #create chrome Page class
             self.init_chrome_api(config)
@@ -225,17 +364,13 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
             if 'chromeTopic' in config["logging"]:
                 self.chrome_topic = config["logging"]["chromeTopic"]
 
-            # read configured panels
-            sites_items = config.items("panels")
-            self.topic_config["panel"]["panels"] = {}
-            for key, panel in sites_items:
-                if key in self.reserved_panel_names:
-                    raise RuntimeError(f"Reserved panel name not allowed: {key}")
-                s_list = panel.split("|")
-                if validators.url(s_list[0]) is True:
-                    self.topic_config["panel"]["panels"][key.upper()] = panel
-                else:
-                    raise RuntimeError(f"Configured URL not well formed: {key}={s_list[0]}")
+            #read default config of FullPageOS
+            self.read_default_url()
+            self.shown_url = self.default_url
+
+            # create the panel table once and hand it over to the chrome api
+            self.topic_config["panel"]["panels"] = self.read_panels(config)
+            self.chrome_pages.set_panels(self.topic_config["panel"]["panels"])
 
         except (KeyError, RuntimeError) as error:
             self.log.error("Error while reading ini file: %s", error)
@@ -259,45 +394,125 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
             self.log.error("Error while reading FullPageOS web page config: %s", error)
             sys.exit()
 
-    def thread_autogui_func(self, cmds):
+    def init_job_engine( self, config ):
+        """
+        Creates the job engine with the number of workers of the [global] section
+        """
+        workers = DEFAULT_WORKERS
+        if "jobWorkers" in config["global"]:
+            try:
+                workers = int(config["global"]["jobWorkers"])
+            except ValueError as error:
+                raise RuntimeError(f"jobWorkers in [global] section: {error}") from error
+            if workers < 1:
+                raise RuntimeError(f"jobWorkers in [global] section must be at least 1: {workers}")
+        job_log(self.log_level, self.log_file_handler)
+        self.jobs = JobEngine(workers, self.jobs_changed)
+
+    def init_system_sampler( self, config ):
+        """
+        Starts the thread which samples the system metrics with the
+        sampleInterval and keeps the last samples values of the [system] section.
+        The optional entries <metric>Deadband, <metric>Alpha and <metric>MaxAge
+        overwrite the default filter of a metric.
+        """
+        collector_log(self.log_level, self.log_file_handler)
+        sampler_log(self.log_level, self.log_file_handler)
+        self.system_sampler, self.proc_collector = create_sampler(config, self.log)
+        self.system_sampler.start()
+
+    def read_job_limits( self, limits ):
+        """
+        Sets the limit of parallel jobs for every shell command.
+        limits contains the configured <command>.maxJobs values.
+        """
+        for name in self.topic_config["shell"]["commands"]:
+            limit = DEFAULT_LIMIT
+            if name in limits:
+                try:
+                    limit = int(limits.pop(name))
+                except ValueError as error:
+                    raise RuntimeError(f"maxJobs of shell command {name}: {error}") from error
+            self.jobs.set_limit("shell", name, limit)
+        for name in limits:
+            raise RuntimeError(f"maxJobs configured for unknown shell command: {name}")
+
+    def jobs_changed( self ):
+        """
+        Call back of the job engine when the state of a job changed
+        """
+        self.publish_now("jobs")
+        self.publish_now("shell")
+
+    def init_autogui_worker( self, config ):
+        """
+        Reads the policies of the [autogui] section and starts the thread
+        which executes the autogui commands
+        """
+        self.autogui_policy = POLICY_QUEUE # pylint: disable=possibly-used-before-assignment
+        self.autogui_panel_policy = POLICY_PREEMPT # pylint: disable=possibly-used-before-assignment
+        if "autogui" in config:
+            self.autogui_policy = config["autogui"].get("policy", self.autogui_policy).lower()
+            self.autogui_panel_policy = config["autogui"].get(
+                "panelPolicy", self.autogui_panel_policy
+            ).lower()
+        for policy in (self.autogui_policy, self.autogui_panel_policy):
+            if policy not in POLICIES: # pylint: disable=possibly-used-before-assignment
+                raise RuntimeError(f"Unknown policy in [autogui] section: {policy}")
+        self.autogui_worker = AutoguiWorker( # pylint: disable=possibly-used-before-assignment
+            self.autogui_worker_feedback, self.autogui_job_dropped
+        )
+        self.autogui_worker.start()
+
+    def autogui_worker_feedback(self, feedback, job):
         """
-        Thread which is executing a string with autogui commands
+        Call back of the autogui worker when a command list starts and ends
         """
-        # excecute autogui commands with this website
-        cmds = cmds.strip()
-        feedback = call_autogui_cmd_list(cmds) # pylint: disable=possibly-used-before-assignment
-        if feedback == "OK":
-            self.log.info("Command list excecuted without error: '%s'",cmds)
+        if feedback.startswith("EXEC"):
+            self.jobs.started(job)
+        elif feedback.startswith("CANCELED"):
+            self.jobs.finished(job, None, CANCELED)
+        elif feedback == "OK":
+            self.log.info("Command list excecuted without error")
+            self.jobs.finished(job, 0)
         else:
             self.log.warning("Command list excecuted with error: '%s'", feedback)
+            self.jobs.finished(job, 1)
         self.autogui_feedback = feedback
+        self.publish_now("autogui")
 
-    def call_autogui_commands(self, cmds):
+    def autogui_job_dropped(self, job):
         """
-        Starts a thread with is excecuting autogui commands from a string
-        parallel to the client.
+        Call back of the autogui worker when a pending command list is dropped
+        """
+        self.jobs.finished(job, None, CANCELED)
+
+    def call_autogui_commands(self, program, policy):
+        """
+        Hands over a compiled list of autogui commands to the autogui worker,
+        which excecutes it parallel to the client.
         """
         if self.autogui_feedback[0 : len("EXEC")] == "EXEC":
-            self.log.warning("Thread allready running can not excecute: '%s'",cmds)
+            self.log.info(
+                "Command list is running. Add '%s' with policy %s", program.source, policy
+            )
+        job = self.jobs.new_job("autogui", program.source)
+        if job is None:
+            self.log.warning("Command list rejected by the job engine: '%s'", program.source)
             return
-        self.autogui_feedback = "EXEC: " + cmds
-        # create thread
-        params = [cmds]
-        thread = threading.Thread(target=self.thread_autogui_func, args=params)
-        # run the thread
-        thread.start()
+        self.autogui_worker.submit(program, policy, job)
 
     def autogui_panel_cmds( self ):
         """call back to perform autogui commands assigned to current panel"""
         if self.autogui_commands is not None and PYAUTOGUI is True:
-            self.call_autogui_commands( self.autogui_commands )
+            self.call_autogui_commands( self.autogui_commands, self.autogui_panel_policy )
 
     def _set_website(self, url):
         """
         helper method to set an url in the browser
         """
         # set a defined given website
-        return self.chrome_pages.activate_tab ( url )
+        return self.chrome_pages.activate_tab ( url ) is not None
 
     def _set_brightness(self, my_config, msg):
         """
@@ -311,22 +526,59 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
             return
         # Synax OK we can call the command to set the brightness
         msg = msg.strip()
-        bmin = my_config["min"]
-        bmax = my_config["max"]
         try:
-            value = int((float(msg)) / (100 / (bmax - bmin))) + bmin
-            value = min(bmax, max( bmin, value ))
+            value = self.brightness_value(my_config, msg)
         except ValueError as error:
             self.log.warning("Error in brightness payload %s: %s", msg, error)
             return
 
-        # call command to set the brightness
-        self.log.debug("Call: %s",my_config["cmd"].format(value=value, displayID=self.display_id))
-        err, msg = subprocess.getstatusoutput(
-            my_config["cmd"].format(value=value, displayID=self.display_id)
-        )
-        if err != 0:
-            self.log.error("Error %s executing command: %s", err, msg)
+        # set the brightness. Values of fast slider moves are coalesced
+        self.brightness_actuator.set(value)
+
+    def brightness_value(self, my_config, percent):
+        """
+        Converts a brightness in percent to the brightness value of the display.
+        Raises ValueError if percent is not a number.
+        """
+        bmin = my_config["min"]
+        bmax = my_config["max"]
+        value = int((float(percent)) / (100 / (bmax - bmin))) + bmin
+        return min(bmax, max( bmin, value ))
+
+    def _set_light(self, my_config, msg): # pylint: disable=unused-argument
+        """
+        mqtt command of the json light: {"state": "ON", "brightness": 50, "transition": 2}
+        The brightness is changed within transition seconds (at most MAX_TRANSITION)
+        """
+        if BACKLIGHT is False:
+            # feature is switched off
+            self.log.warning("Error light command received but backlight feature is not enabled!")
+            return
+        try:
+            command = json.loads(msg)
+            if not isinstance(command, dict):
+                raise ValueError("json object expected")
+            state = str(command.get("state", "ON")).upper()
+            if state not in ("ON", "OFF"):
+                raise ValueError(f"unknown state {state}")
+            transition = float(command.get("transition", 0))
+            if not math.isfinite(transition) or transition < 0:
+                raise ValueError(f"invalid transition {transition}")
+            transition = min(transition, MAX_TRANSITION)
+            value = None
+            if "brightness" in command:
+                value = self.brightness_value(
+                    self.topic_config["brightness"], command["brightness"]
+                )
+        except (ValueError, TypeError) as error:
+            self.log.warning("Error in light payload %s: %s", msg, error)
+            return
+
+        if value is not None and state == "ON":
+            # ramp the brightness to the new value
+            self.brightness_actuator.set(value, transition)
+        self._set_backlight(self.topic_config["backlight"], state)
+        self.publish_now("light")
 
     def _set_backlight(self, my_config, msg):
         """
@@ -346,49 +598,32 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
 
         # call command to set the backlight
         if msg != self.backlight:
-            self.log.debug(my_config["cmd"].format(value=value, displayID=self.display_id))
-            err, ret = subprocess.getstatusoutput(
-                my_config["cmd"].format(value=value, displayID=self.display_id)
-            )
+            err, ret = my_config["attribute"].write(value)
             if err != 0:
                 self.log.error("Error %s executing command: %s", err, ret)
             else:
                 self.backlight = msg
 
-    def thread_shell_cmd_func(self, cmd):
+    def shell_cmd_job(self, cmd):
         """
-        thread which executes a shell command in parallel to the client
+        job which executes a shell command in parallel to the client.
+        Returns the exit code of the command.
         """
         # excecute system cmd
         err, msg = subprocess.getstatusoutput(cmd)
         if err != 0:
             self.log.error("Error %s executing command: %s", err, msg)
-            self.shell_cmd = IDLE
-        else:
-            self.shell_cmd = IDLE
+        return err
 
     def _set_shell_cmd(self, my_config, msg):
         """
-        mqtt command to execute a shell command in a parallel thread
+        mqtt command to execute a shell command as job of the job engine
         """
         msg = msg.strip().upper()
         if msg.upper() in my_config["commands"]:
-            if self.shell_cmd != IDLE:
-                # currently is another command running. Skip this command
-                self.log.warning("Shell command allready running skip: %s", msg)
-                return
-            # call the configured command
+            # call the configured command. The job engine skips it if the limit is reached
             self.log.debug("Call command: %s", my_config["commands"][msg])
-            self.shell_cmd = msg
-            # publish that the command is now executed
-            self._publish_shell_cmd(
-                self.topic_root + "/" + my_config["topic"], my_config
-            )
-            # ürepare thread
-            params = [my_config["commands"][msg]]
-            thread = threading.Thread(target=self.thread_shell_cmd_func, args=params)
-            # run the thread
-            thread.start()
+            self.jobs.submit("shell", msg, self.shell_cmd_job, my_config["commands"][msg])
         else:
             self.log.info("Unknown command payload received: '%s'", msg)
 
@@ -406,7 +641,7 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
             self.log.warning("Received url could not be opened: '%s'", msg)
         else:
             self.autogui_commands = None
-            self.topic_config["panel"]["panels"][PANEL_SHOW_URL] = msg
+            self.shown_url = msg
 
     def _set_panel(self, my_config, msg):
         """
@@ -415,24 +650,22 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
         msg = msg.strip()
         newsite = None
         if msg.upper() in my_config["panels"]:
-            definition = my_config["panels"][msg.upper()]
-            self.current_panel = msg.upper()
-            # does the definition contain autogui commands?
-            index = definition.find("|")
-            if index > 0:
-                self.autogui_commands = definition[index + 1 :]
-                newsite = definition[0:index]
-            else:
-                newsite = definition
-                self.autogui_commands = None
+            panel = my_config["panels"][msg.upper()]
+            self.current_panel = panel.name
+            self.autogui_commands = panel.program
+            newsite = self.shown_url if panel.name == PANEL_SHOW_URL else panel.url
         else:
             self.log.info("Received panel name is not configured: '%s'", msg.upper())
             return
 
         # set the new url in browser:
         if self._set_website ( newsite ) is True:
-            if self.autogui_commands is not None and PYAUTOGUI is True:
-                self.call_autogui_commands(self.autogui_commands)
+            if PYAUTOGUI is True:
+                if self.autogui_commands is not None:
+                    self.call_autogui_commands(self.autogui_commands, self.autogui_panel_policy)
+                elif self.autogui_panel_policy == POLICY_PREEMPT:
+                    # commands of the previous panel are not valid on this panel
+                    self.autogui_worker.cancel()
         else:
             self.log.error("Panel could not be activated: '%s'", msg.upper())
 
@@ -441,40 +674,82 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
         mqtt command to execute a list of autogui commands from a string
         """
         if PYAUTOGUI is True:
-            self.call_autogui_commands(msg)
+            if msg.strip().lower() == "cancel":
+                # cancel running and pending command lists
+                if self.autogui_worker.cancel() is False:
+                    self.log.info("No command list to cancel")
+                return
+            # the complete command list is checked before the first command is excecuted
+            err, program = compile_autogui_cmd_list(msg) # pylint: disable=possibly-used-before-assignment
+            if err != "OK":
+                self.log.warning("Command list not excecuted: '%s'", err)
+                if self.autogui_feedback[0 : len("EXEC")] != "EXEC":
+                    self.autogui_feedback = err
+                return
+            self.call_autogui_commands(program, self.autogui_policy)
 
     def _publish_system(self, topic, my_config): # pylint: disable=unused-argument
         """
-        publish the system topic
+        returns the content of the system topic
         """
         # collect system info
         system_info = {}
         system_info["chrome_tabs"] = self.chrome_pages.tab_count()
-        system_info["cpu_temp"] = round(gpiozero.CPUTemperature().temperature, 2)
-        system_info["cpu_load"] = int(gpiozero.LoadAverage().load_average * 100)
-        system_info["disk_usage"] = round(gpiozero.DiskUsage().usage, 2)
+        # filtered value and min, avg, max of the sampler window
+        system_info["metrics"] = {}
+        for name in self.system_sampler.sources:
+            accepted = self.system_sampler.filtered(name)
+            if accepted is None:
+                continue
+            value, aggregates = accepted
+            digits = METRIC_DIGITS[name]
+            system_info[name] = round(value, digits) if digits > 0 else int(value)
+            system_info["metrics"][name] = aggregates
         if PYAUTOGUI is True:
             system_info["mouse_position"] = pyautogui.position() # pylint: disable=possibly-used-before-assignment
             system_info["display_size"] = pyautogui.size()
         system_info["default_url"] = self.default_url
-        # create a json out of it
-        msg = json.dumps(system_info)
-        # send message to broker
-        result = self.client.publish(topic, msg)
-        # result: [0, 1]
-        status = result[0]
-        if status == 0:
-            self.log.debug("Send '%s' to topic %s", msg, topic)
-        else:
-            self.log.error("Failed to send message to topic %s", topic)
+        if BACKLIGHT is True:
+            system_info["brightness_commands"] = self.brightness_actuator.statistics()
+        system_info["connection"] = self.connection_info
+        system_info["outbox"] = self.outbox_statistics()
+        return system_info
+
+    def _set_samples(self, my_config, msg): # pylint: disable=unused-argument
+        """
+        mqtt command to request the samples of a system metric
+        """
+        name = msg.strip().lower()
+        if name not in self.system_sampler.sources:
+            self.log.warning("Unknown system metric requested: %s", name)
+            return
+        self.samples_request = name
+        self.publish_now("samples")
+
+    def _publish_samples(self, topic, my_config): # pylint: disable=unused-argument
+        """
+        publishes the samples of the requested system metric once.
+        Every request is answered, also if the samples did not change.
+        """
+        name = self.samples_request
+        if name is None:
+            return None
+        self.samples_request = None
+        # answer also unchanged samples: publish like in a full publish cycle
+        self.unpublished = True
+        return {
+            "name": name,
+            "interval": self.system_sampler.interval,
+            "values": self.system_sampler.samples(name),
+        }
 
     def _publish_chrome(self, topic, my_config): # pylint: disable=unused-argument
         """
-        publish the chrome topic
+        returns the content of the chrome topic
         """
         #check if chrome topic is enabled
         if self.chrome_topic != "true":
-            return
+            return None
         # collect system info
         chrome = {}
         active = self.chrome_pages.active()
@@ -488,156 +763,110 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
             jt["url"] = tab.url()
             jt["timeout"] = self.chrome_pages.get_timeout(tab)
             chrome["tabs"][t_id] = jt
-        # create a json out of it
-        msg = json.dumps(chrome)
-        # send message to broker
-        result = self.client.publish(topic, msg)
-        # result: [0, 1]
-        status = result[0]
-        if status == 0:
-            self.log.debug("Send '%s' to topic %s", msg, topic)
-        else:
-            self.log.error("Failed to send message to topic %s", topic)
+        chrome["http"] = self.chrome_pages.http_statistics()
+        return chrome
 
-    def _publish_brightness(self, topic, my_config):
+    def _publish_brightness(self, topic, my_config): # pylint: disable=unused-argument
         """
-        publish the brightness topic
+        returns the brightness in percent
         """
         if BACKLIGHT is False:
             # feature is switched off
-            return
-        # call command to read the brightness
-        err, msg = subprocess.getstatusoutput(
-            my_config["get"].format(displayID=self.display_id)
-        )
-        if not err:
-            bmin = my_config["min"]
-            bmax = my_config["max"]
-            msg = int(float(msg) * (100 / (bmax - bmin)))
-            # send message to broker
-            if self.brightness != msg or self.unpublished is True:
-                result = self.client.publish(topic, msg)
-                # result: [0, 1]
-                status = result[0]
-                if status == 0:
-                    self.log.debug("Send '%s' to topic %s", msg, topic)
-                    self.brightness = msg
-                else:
-                    self.log.error("Failed to send message to topic %s", topic)
-        else:
+            return None
+        # read the brightness
+        err, msg = my_config["attribute"].read()
+        if err:
+            self.log.error("Error reading display brightness: %s", err)
+            return None
+        bmin = my_config["min"]
+        bmax = my_config["max"]
+        return int(float(msg) * (100 / (bmax - bmin)))
+
+    def _publish_light(self, topic, my_config): # pylint: disable=unused-argument
+        """
+        returns the state of the json light: {"state": "ON", "brightness": 50}
+        """
+        if BACKLIGHT is False:
+            # feature is switched off
+            return None
+        brightness_config = self.topic_config["brightness"]
+        backlight_config = self.topic_config["backlight"]
+        err, brightness = brightness_config["attribute"].read()
+        if err:
             self.log.error("Error reading display brightness: %s", err)
+            return None
+        err, backlight = backlight_config["attribute"].read()
+        if err:
+            self.log.error("Error reading display backlight status: %s", err)
+            return None
+        bmin = brightness_config["min"]
+        bmax = brightness_config["max"]
+        light = {}
+        light["state"] = "ON" if backlight.strip() == backlight_config["ON"] else "OFF"
+        light["brightness"] = int(float(brightness) * (100 / (bmax - bmin)))
+        return light
 
     def _publish_shell_cmd(self, topic, my_config): # pylint: disable=unused-argument
         """
-        publish the shell command topic
+        returns the shell command which is running
         """
-        if self.shell_cmd != self.published_shell_cmd or self.unpublished is True:
-            result = self.client.publish(topic, self.shell_cmd.capitalize())
-            # result: [0, 1]
-            status = result[0]
-            if status == 0:
-                self.log.debug("Send '%s' to topic %s", self.shell_cmd, topic)
-                self.published_shell_cmd = self.shell_cmd
-            else:
-                self.log.error("Failed to send message to topic %s", topic)
+        # show the last started command which is still active
+        active = self.jobs.active("shell")
+        shell_cmd = active[-1] if len(active) > 0 else IDLE
+        return shell_cmd.capitalize()
 
-    def _publish_backlight(self, topic, my_config):
+    def _publish_jobs(self, topic, my_config): # pylint: disable=unused-argument
         """
-        publish the backlight topic
+        returns the status of the job engine and the last jobs
+        """
+        return self.jobs.status()
+
+    def _publish_backlight(self, topic, my_config): # pylint: disable=unused-argument
+        """
+        returns the backlight state ON or OFF
         """
         if BACKLIGHT is False:
             # feature is switched off
-            return
-        # call command to read the backlight state
-        err, msg = subprocess.getstatusoutput(
-            my_config["get"].format(displayID=self.display_id)
-        )
-        if not err:
-            on = my_config["ON"]
-            msg = msg.strip()
-            if msg == on:
-                value = "ON"
-            else:
-                value = "OFF"
-            # send message to broker
-            if self.backlight_published != value or self.unpublished is True:
-                result = self.client.publish(topic, value)
-                # result: [0, 1]
-                status = result[0]
-                if status == 0:
-                    self.log.debug("Send '%s' to topic %s", value, topic)
-                    self.backlight = value
-                    self.backlight_published = value
-                else:
-                    self.log.error("Failed to send message to topic %s", topic)
-        else:
+            return None
+        # read the backlight state
+        err, msg = my_config["attribute"].read()
+        if err:
             self.log.error("Error reading display backlight status: %s", err)
+            return None
+        if msg.strip() == my_config["ON"]:
+            self.backlight = "ON"
+        else:
+            self.backlight = "OFF"
+        return self.backlight
 
     def _publish_url(self, topic, my_config): # pylint: disable=unused-argument
         """
-        publish the url topic
+        returns the url of the active page
         """
         #Get current url from chrome:
-        current_url = self.chrome_pages.active_url()
-        if self.published_url != current_url or self.unpublished is True:
-            result = self.client.publish(topic, current_url)
-            # result: [0, 1]
-            status = result[0]
-            if status == 0:
-                self.log.debug("Send '%s' to topic %s",current_url, topic)
-                self.published_url = current_url
-            else:
-                self.log.error("Failed to send message to topic %s", topic)
+        return self.chrome_pages.active_url()
 
     def _publish_panel(self, topic, my_config): # pylint: disable=unused-argument
         """
-        publish the panel topic
-        """
-        #try to find panel by current url from chrome:
-        current_url = self.chrome_pages.active_url()
-        self.current_panel = PANEL_SHOW_URL
-        self.autogui_commands = None
-        #search in panel configuration
-        for panel_name, url in my_config['panels'].items():
-            #remove autogui commands in url definition:
-            if len(url.split('|')) > 1:
-                cmds = url.split('|')[1]
-            else:
-                cmds = None
-            url = url.split('|')[0]
-            if current_url == url:
-                self.current_panel = panel_name
-                self.autogui_commands = cmds
-                break
-        if ( self.current_panel != self.current_panel_published or
-            self.unpublished is True ):
-            result = self.client.publish(topic, self.current_panel.capitalize())
-            # result: [0, 1]
-            status = result[0]
-            if status == 0:
-                self.log.debug("Send '%s' to topic %s", self.current_panel, topic)
-                self.current_panel_published = self.current_panel
-            else:
-                self.log.error("Failed to send message to topic %s", topic)
+        returns the panel which is shown
+        """
+        #find panel by current url from chrome:
+        panel_name = self.chrome_pages.active_panel()
+        if panel_name is None:
+            self.current_panel = PANEL_SHOW_URL
+            self.autogui_commands = None
+        else:
+            self.current_panel = panel_name
+            self.autogui_commands = my_config["panels"][panel_name].program
+        return self.current_panel.capitalize()
 
     def _publish_autogui_results(self, topic, my_config): # pylint: disable=unused-argument
         """
-        publish the autogui result topic
+        returns the result of the last autogui commands
         """
-        # publish result of last autogui commads
-        if PYAUTOGUI is True:
-            if (
-                self.unpublished is True
-                or self.autogui_feedback != self.autogui_feedback_published
-            ):
-                result = self.client.publish(topic, self.autogui_feedback)
-                # result: [0, 1]
-                status = result[0]
-                if status == 0:
-                    self.log.debug("Send '%s' to topic %s", self.autogui_feedback, topic)
-                    self.autogui_feedback_published = self.autogui_feedback
-                else:
-                    self.log.error("Failed to send message to topic %s", topic)
+        if PYAUTOGUI is False:
+            return None
+        return self.autogui_feedback
 
     def ha_discover(self):
         """
@@ -695,12 +924,8 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
         self.ha_publish(topic, payload)
 
         if BACKLIGHT is True:
-            # backlight "light"
-            topic, payload = self.ha.light(
-                "backlight",
-                self.topic_root + "/backlight",
-                self.topic_root + "/brightness_percent",
-            )
+            # backlight "light" with json schema to support transitions
+            topic, payload = self.ha.json_light("backlight", self.topic_root + "/light")
             self.ha_publish(topic, payload)
 
         if PYAUTOGUI is True:
@@ -725,13 +950,19 @@ class MqttDisplayClient(BMC.BaseMqttClient): # pylint: disable=too-many-instance
         # call time time tick of chrome pages
         self.chrome_pages.tick()
 
+    def reconnect_callback(self):
+        """
+        publish the reconnect statistics after the connection is restored
+        """
+        self.publish_now("system")
+
 def display_client():
     """
     main function to start the client
     """
     client = MqttDisplayClient(CONFIG_FILE)
     client.connect()
-    client.ha_discover()
+    client.discover()
     client.publish_loop()
     return client
 
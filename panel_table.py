@@ -0,0 +1,117 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution:
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Module implements an immutable table of the configured panels.
+The table is created once when the ini file is read.
+"""
+
+from collections.abc import Mapping
+
+# used to validate URLs:
+import validators
+
+#
+# global constants
+#
+PANEL_BUILTIN = 1  # panel is defined by the client (DEFAULT, URL, BLANK)
+PANEL_AUTOGUI = 2  # panel has autogui commands which are executed after loading
+
+
+class Panel:
+    """
+    Immutable entry of the panel table
+    """
+
+    __slots__ = ("name", "url", "normalized_url", "program", "flags")
+
+    def __init__(self, name, url, normalized_url, program=None, flags=0): # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """Create the panel entry"""
+        for slot, value in zip(self.__slots__, (name, url, normalized_url, program, flags)):
+            object.__setattr__(self, slot, value)
+
+    def __setattr__(self, name, value):
+        """Panels can not be changed"""
+        raise AttributeError(f"Panel is immutable: {name}")
+
+    def __repr__(self):
+        """Returns a printable panel"""
+        return f"Panel({self.name}, {self.url}, flags={self.flags})"
+
+
+class PanelTable(Mapping):
+    """
+    Immutable table of panels. Key: panel name (upper case), Value: Panel
+    """
+
+    __slots__ = ("_panels",)
+
+    def __init__(self, panels):
+        """Create the table from a list of panels"""
+        self._panels = {panel.name: panel for panel in panels}
+
+    def __getitem__(self, name):
+        """Returns the panel with this name"""
+        return self._panels[name]
+
+    def __iter__(self):
+        """Iterates over the panel names in configuration order"""
+        return iter(self._panels)
+
+    def __len__(self):
+        """Returns the number of panels"""
+        return len(self._panels)
+
+
+def parse_panel(name, definition, normalize, compile_cmds=None):
+    """
+    Parse a panel definition of the ini file: url|optional autogui commands
+    compile_cmds(cmds) returns (err, program) and is used to check the autogui
+    commands. Without compile_cmds the panel has no program.
+    Raises RuntimeError on errors in the definition.
+    """
+    url, _, cmds = definition.partition("|")
+    url = url.strip()
+    if validators.url(url) is not True:
+        raise RuntimeError(f"Configured URL not well formed: {name}={url}")
+    program = None
+    flags = 0
+    cmds = cmds.strip()
+    if cmds != "":
+        flags |= PANEL_AUTOGUI
+        if compile_cmds is not None:
+            err, program = compile_cmds(cmds)
+            if err != "OK":
+                raise RuntimeError(f"Error in autogui commands of panel {name}: {err}")
+    return Panel(name.upper(), url, normalize(url), program, flags)
+
+
+def create_panel_table(items, reserved, builtin, normalize, compile_cmds=None):
+    """
+    Creates the panel table from the items of the [panels] section
+    and the builtin panels (Key: name, Value: url).
+    Names in the reserved list are not allowed in the [panels] section.
+    Raises RuntimeError on configuration errors.
+    """
+    panels = []
+    for name, definition in items:
+        if name.upper() in reserved:
+            raise RuntimeError(f"Reserved panel name not allowed: {name}")
+        panels.append(parse_panel(name, definition, normalize, compile_cmds))
+    for name, url in builtin.items():
+        panels.append(Panel(name, url, normalize(url), None, PANEL_BUILTIN))
+    return PanelTable(panels)
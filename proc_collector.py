@@ -0,0 +1,257 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution:
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Module implements a collector of system metrics from /proc, sysfs and statvfs.
+The /proc and sysfs files are opened once and re-read with pread into
+preallocated buffers, so a sample does not open files or start processes.
+"""
+
+import logging
+import os
+import time
+
+#
+# global constants
+#
+PROC = "/proc"
+THERMAL = "/sys/class/thermal/thermal_zone0/temp"  # CPU temperature in millidegrees
+LOADAVG_COLUMN = 1  # 5 minutes load average, like gpiozero LoadAverage
+BUFFER_SIZE = 4096  # initial size of the read buffers, grows if a file is larger
+MB = 1024 * 1024
+KB = 1024
+CHROMIUM_NAMES = (b"chromium", b"chrome")  # process names of the browser
+CHROMIUM_RESCAN = 30  # seconds between two searches for new browser processes
+DISK_PATH = "/"  # file system of the disk metric
+
+#
+# initialize logger
+#
+LOG = logging.getLogger("ProcCollector")
+logging.basicConfig()
+
+
+def collector_log(level, handler):
+    """
+    set the log level of the module
+    """
+    LOG.setLevel(level)
+    if handler is not None:
+        LOG.addHandler(handler)
+
+
+class ProcFile:
+    """
+    Keeps a /proc file open and reads it with pread into a preallocated buffer
+    """
+
+    def __init__(self, path, size=BUFFER_SIZE):
+        """Open the file. Raises OSError if the file can not be opened"""
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY)
+        self.buffer = bytearray(size)
+        self.length = 0  # number of valid bytes in the buffer
+
+    def read(self):
+        """
+        Reads the file into the buffer and returns the number of bytes.
+        The buffer grows if the file does not fit into it.
+        """
+        while True:
+            self.length = os.preadv(self.fd, [self.buffer], 0)
+            if self.length < len(self.buffer):
+                return self.length
+            self.buffer = bytearray(2 * len(self.buffer))
+
+    def field(self, key):
+        """
+        Returns the integer after key in the buffer (e.g. b"MemAvailable:")
+        or None if the key is not found
+        """
+        start = self.buffer.find(key, 0, self.length)
+        if start < 0:
+            return None
+        start += len(key)
+        end = self.buffer.find(b"\n", start, self.length)
+        return int(self.buffer[start:end].split(None, 1)[0])
+
+    def lines(self, skip=0):
+        """Returns the lines of the buffer without the first skip lines"""
+        return self.buffer[: self.length].splitlines()[skip:]
+
+    def close(self):
+        """Close the file"""
+        os.close(self.fd)
+
+
+class ProcCollector:
+    """
+    Collects CPU temperature and load, memory, swap, uptime, network traffic,
+    wifi signal level, free disk space and the memory of the browser processes.
+    collect() reads all sources, values contains the latest values:
+    Key: metric name, Value: number. Metrics which are not available
+    on the system (e.g. no wifi) are missing in values.
+    """
+
+    def __init__(self, proc=PROC, disk_path=DISK_PATH, thermal=THERMAL):
+        """Open the /proc and sysfs files"""
+        self.proc = proc
+        self.disk_path = disk_path
+        self.page_size = os.sysconf("SC_PAGE_SIZE")
+        self.files = {}
+        paths = {
+            name: os.path.join(proc, name)
+            for name in ("loadavg", "meminfo", "uptime", "net/dev", "net/wireless")
+        }
+        paths["thermal"] = thermal
+        for name, path in paths.items():
+            try:
+                self.files[name] = ProcFile(path)
+            except OSError as error:
+                LOG.info("%s not available: %s", path, error)
+        self.errors = {}  # last error per reader, logged only once
+        self.net_last = None  # (time, rx bytes, tx bytes) of the last sample
+        self.chromium = {}  # statm files of the browser processes: Key: pid
+        self.chromium_scan = None  # monotonic time of the last process search
+        self.values = {}
+
+    def read_thermal(self):
+        """CPU temperature in celsius"""
+        thermal = self.files["thermal"]
+        thermal.read()
+        self.values["cpu_temp"] = int(thermal.buffer[: thermal.length]) / 1000
+
+    def read_loadavg(self):
+        """Load average in percent"""
+        loadavg = self.files["loadavg"]
+        loadavg.read()
+        fields = loadavg.buffer[: loadavg.length].split()
+        self.values["cpu_load"] = float(fields[LOADAVG_COLUMN]) * 100
+
+    def read_meminfo(self):
+        """Available memory and used swap in MB"""
+        meminfo = self.files["meminfo"]
+        meminfo.read()
+        available = meminfo.field(b"MemAvailable:")
+        if available is not None:
+            self.values["mem_available"] = available * KB / MB
+        swap_total = meminfo.field(b"SwapTotal:")
+        swap_free = meminfo.field(b"SwapFree:")
+        if swap_total is not None and swap_free is not None:
+            self.values["swap_used"] = (swap_total - swap_free) * KB / MB
+
+    def read_uptime(self):
+        """Uptime in seconds"""
+        uptime = self.files["uptime"]
+        uptime.read()
+        self.values["uptime"] = float(uptime.buffer[: uptime.buffer.find(b" ", 0, uptime.length)])
+
+    def read_net(self, now):
+        """Received and transmitted kB/s of all interfaces except loopback"""
+        net = self.files["net/dev"]
+        net.read()
+        rx = tx = 0
+        for line in net.lines(2):
+            name, _, counters = line.partition(b":")
+            if name.strip() == b"lo":
+                continue
+            fields = counters.split()
+            rx += int(fields[0])
+            tx += int(fields[8])
+        if self.net_last is not None and now > self.net_last[0]:
+            seconds = now - self.net_last[0]
+            self.values["net_rx"] = max(0, rx - self.net_last[1]) / KB / seconds
+            self.values["net_tx"] = max(0, tx - self.net_last[2]) / KB / seconds
+        self.net_last = (now, rx, tx)
+
+    def read_wireless(self):
+        """Signal level in dBm of the first wifi interface"""
+        wireless = self.files["net/wireless"]
+        wireless.read()
+        for line in wireless.lines(2):
+            fields = line.partition(b":")[2].split()
+            if len(fields) > 2:
+                self.values["wifi_rssi"] = float(fields[2])
+                return
+        self.values.pop("wifi_rssi", None)
+
+    def scan_chromium(self, now):
+        """Open the statm files of all browser processes"""
+        self.chromium_scan = now
+        for entry in os.listdir(self.proc):
+            if not entry.isdigit() or int(entry) in self.chromium:
+                continue
+            try:
+                with open(os.path.join(self.proc, entry, "comm"), "rb") as file:
+                    comm = file.read()
+                if comm.startswith(CHROMIUM_NAMES):
+                    self.chromium[int(entry)] = ProcFile(os.path.join(self.proc, entry, "statm"), 128)
+            except OSError:
+                # process terminated
+                continue
+
+    def read_chromium(self, now):
+        """Resident memory in MB of all browser processes"""
+        if self.chromium_scan is None or now - self.chromium_scan >= CHROMIUM_RESCAN:
+            self.scan_chromium(now)
+        pages = 0
+        for pid, statm in list(self.chromium.items()):
+            try:
+                statm.read()
+                pages += int(statm.buffer[: statm.length].split(None, 2)[1])
+            except (OSError, ValueError, IndexError):
+                # process terminated
+                statm.close()
+                del self.chromium[pid]
+        if len(self.chromium) > 0:
+            self.values["chromium_rss"] = pages * self.page_size / MB
+        else:
+            self.values.pop("chromium_rss", None)
+
+    def read_disk(self):
+        """Free disk space in MB"""
+        stat = os.statvfs(self.disk_path)
+        self.values["disk_free"] = stat.f_bavail * stat.f_frsize / MB
+
+    def read(self, name, reader):
+        """Calls a reader. An error is only logged if it differs from the last one"""
+        try:
+            reader()
+        except (OSError, ValueError, IndexError) as error:
+            if self.errors.get(name) != str(error):
+                LOG.error("Error reading %s: %s", name, error)
+                self.errors[name] = str(error)
+            return
+        self.errors.pop(name, None)
+
+    def collect(self):
+        """Reads all sources. Returns values"""
+        now = time.monotonic()
+        readers = (
+            ("thermal", self.read_thermal),
+            ("loadavg", self.read_loadavg),
+            ("meminfo", self.read_meminfo),
+            ("uptime", self.read_uptime),
+            ("net/dev", lambda: self.read_net(now)),
+            ("net/wireless", self.read_wireless),
+        )
+        for name, reader in readers:
+            if name in self.files:
+                self.read(name, reader)
+        self.read("browser processes", lambda: self.read_chromium(now))
+        self.read("disk", self.read_disk)
+        return self.values
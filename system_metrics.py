@@ -0,0 +1,134 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution:
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Module defines the system metrics of the display client and creates the
+sampler which reads them from gpiozero and the /proc collector.
+"""
+
+import gpiozero
+from system_sampler import SystemSampler, DeadbandFilter, DEFAULT_INTERVAL, DEFAULT_SAMPLES
+from proc_collector import ProcCollector
+
+#
+# global constants
+#
+# metrics of the system sampler: Key: name, Value: (gpiozero class, attribute, factor, digits)
+SYSTEM_METRICS = {
+    "disk_usage": (gpiozero.DiskUsage, "usage", 1, 2),
+}
+# metrics of the /proc collector: Key: name, Value: digits
+COLLECTOR_METRICS = {
+    "cpu_temp": 2,
+    "cpu_load": 0,
+    "mem_available": 1,
+    "swap_used": 1,
+    "uptime": 0,
+    "net_rx": 1,
+    "net_tx": 1,
+    "wifi_rssi": 0,
+    "chromium_rss": 1,
+    "disk_free": 0,
+}
+# digits of all system metrics
+METRIC_DIGITS = {
+    **{name: metric[3] for name, metric in SYSTEM_METRICS.items()},
+    **COLLECTOR_METRICS,
+}
+# default filter of the system metrics: Key: name, Value: (deadband, alpha, max age)
+METRIC_FILTERS = {
+    "cpu_temp": (0.5, 1, 600),
+    "cpu_load": (1, 1, 600),
+    "disk_usage": (0.1, 1, 3600),
+    "mem_available": (20, 1, 600),
+    "swap_used": (10, 1, 600),
+    "uptime": (3600, 1, 0),
+    "net_rx": (50, 0.3, 600),
+    "net_tx": (50, 0.3, 600),
+    "wifi_rssi": (3, 0.3, 600),
+    "chromium_rss": (20, 1, 600),
+    "disk_free": (100, 1, 3600),
+}
+
+
+def read_metric_filter(section, name):
+    """
+    Creates the deadband filter of a system metric. The default filter
+    of the metric is overwritten by the entries of the [system] section
+    """
+    options = {"Deadband": "deadband", "Alpha": "alpha", "MaxAge": "max_age"}
+    kwargs = dict(zip(options.values(), METRIC_FILTERS.get(name, (0, 1, 0))))
+    for option, attr in options.items():
+        if name + option in section:
+            try:
+                kwargs[attr] = float(section[name + option])
+            except ValueError as error:
+                raise RuntimeError(f"{name}{option} in [system] section: {error}") from error
+    if kwargs.get("deadband", 0) < 0 or kwargs.get("max_age", 0) < 0:
+        raise RuntimeError(
+            f"{name}Deadband and {name}MaxAge in [system] section must not be negative"
+        )
+    if not 0 < kwargs.get("alpha", 1) <= 1:
+        raise RuntimeError(f"{name}Alpha in [system] section must be between 0 and 1")
+    return DeadbandFilter(**kwargs)
+
+
+def create_sampler(config, log):
+    """
+    Creates the sampler of all system metrics with the sampleInterval and
+    the last samples values of the [system] section. The optional entries
+    <metric>Deadband, <metric>Alpha and <metric>MaxAge overwrite the default
+    filter of a metric. Returns the sampler and the /proc collector.
+    Raises RuntimeError if the configuration is invalid
+    """
+    interval = DEFAULT_INTERVAL
+    samples = DEFAULT_SAMPLES
+    section = {}
+    if "system" in config:
+        section = config["system"]
+        try:
+            interval = float(section.get("sampleInterval", interval))
+            samples = int(section.get("samples", samples))
+        except ValueError as error:
+            raise RuntimeError(f"[system] section: {error}") from error
+        if interval <= 0 or samples < 1:
+            raise RuntimeError("sampleInterval and samples in [system] section must be positive")
+    filters = {name: read_metric_filter(section, name) for name in METRIC_DIGITS}
+    # the gpiozero devices are created once and read by the sampler
+    sources = {}
+    for name, metric in SYSTEM_METRICS.items():
+        try:
+            device = metric[0]()
+        except (gpiozero.GPIOZeroError, OSError) as error:
+            log.warning("System metric %s is not available: %s", name, error)
+            continue
+        sources[name] = (
+            lambda device=device, attribute=metric[1], factor=metric[2]:
+            getattr(device, attribute) * factor
+        )
+    # the /proc files are kept open and read once per sample
+    collector = ProcCollector()
+    for name in COLLECTOR_METRICS:
+        sources[name] = lambda name=name: collector.values.get(name)
+    sampler = SystemSampler(
+        sources,
+        interval,
+        samples,
+        {name: filters[name] for name in sources},
+        collector.collect,
+    )
+    return sampler, collector
@@ -0,0 +1,214 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution:
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""Module implements a thread which samples system metrics at a fixed
+rate into ring buffers and calculates min, avg and max over the window.
+"""
+
+import array
+import logging
+import threading
+import time
+
+#
+# global constants
+#
+DEFAULT_INTERVAL = 1.0  # default time in seconds between two samples
+DEFAULT_SAMPLES = 60  # default number of samples in the ring buffers
+
+#
+# initialize logger
+#
+LOG = logging.getLogger("SystemSampler")
+logging.basicConfig()
+
+
+def sampler_log(level, handler):
+    """
+    set the log level of the module
+    """
+    LOG.setLevel(level)
+    if handler is not None:
+        LOG.addHandler(handler)
+
+
+class RingBuffer:
+    """
+    Fixed size ring buffer of float values
+    """
+
+    def __init__(self, size):
+        """Create the buffer with size values"""
+        self.values = array.array("d", bytes(8 * size))
+        self.size = size
+        self.count = 0  # number of valid values
+        self.next = 0  # index of the next value
+
+    def add(self, value):
+        """Add a value, the oldest value is overwritten if the buffer is full"""
+        self.values[self.next] = value
+        self.next = (self.next + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def last(self):
+        """Returns the latest value or None if the buffer is empty"""
+        if self.count == 0:
+            return None
+        return self.values[self.next - 1]
+
+    def samples(self):
+        """Returns the values from the oldest to the latest"""
+        if self.count < self.size:
+            return self.values[: self.count].tolist()
+        return self.values[self.next :].tolist() + self.values[: self.next].tolist()
+
+    def aggregates(self, digits=2):
+        """Returns min, avg and max of the values or None if the buffer is empty"""
+        if self.count == 0:
+            return None
+        values = self.values if self.count == self.size else self.values[: self.count]
+        return {
+            "min": round(min(values), digits),
+            "avg": round(sum(values) / self.count, digits),
+            "max": round(max(values), digits),
+        }
+
+
+class DeadbandFilter:
+    """
+    Optional EMA smoothing and deadband of a metric. A new value is only
+    accepted if the smoothed value leaves the band around the last accepted
+    value or the last accepted value is older than max_age seconds.
+    alpha=1 disables the smoothing, max_age=0 disables the maximal age.
+    """
+
+    def __init__(self, deadband=0, alpha=1, max_age=0):
+        """Create the filter"""
+        self.deadband = deadband
+        self.alpha = alpha
+        self.max_age = max_age
+        self.smoothed = None  # EMA of the samples
+        self.value = None  # last accepted value
+        self.accepted = 0  # monotonic time of the last accepted value
+
+    def update(self, value, now):
+        """Adds a sample. Returns True if a new value is accepted"""
+        if self.smoothed is None:
+            self.smoothed = value
+        else:
+            self.smoothed += self.alpha * (value - self.smoothed)
+        if (
+            self.value is None
+            or abs(self.smoothed - self.value) > self.deadband
+            or (self.max_age > 0 and now - self.accepted >= self.max_age)
+        ):
+            self.value = self.smoothed
+            self.accepted = now
+            return True
+        return False
+
+
+class SystemSampler(threading.Thread):
+    """
+    Thread which calls the sources every interval seconds and stores the
+    values in one ring buffer per source. sources is a dictionary
+    Key: metric name, Value: function which returns the current value.
+    A source returns None if there is no value at the moment.
+    filters is an optional dictionary Key: metric name, Value: DeadbandFilter.
+    collect is an optional function which is called before the sources are read.
+    """
+
+    def __init__(self, sources, interval=DEFAULT_INTERVAL, samples=DEFAULT_SAMPLES, filters=None, collect=None): # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """Create the sampler thread"""
+        threading.Thread.__init__(self, name="SystemSampler", daemon=True)
+        self.sources = sources
+        self.collect = collect
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.rings = {name: RingBuffer(samples) for name in sources}
+        self.filters = {name: DeadbandFilter() for name in sources}
+        if filters is not None:
+            self.filters.update(filters)
+        self.accepted = {}  # last accepted value and aggregates per metric
+        self.errors = {}  # last error per source, logged only once
+        self.collect_error = None  # last error of collect, logged only once
+
+    def sample(self):
+        """Read all sources once"""
+        now = time.monotonic()
+        if self.collect is not None:
+            try:
+                self.collect()
+                self.collect_error = None
+            except Exception as error: # pylint: disable=broad-exception-caught
+                # the sources keep their last values
+                if self.collect_error != str(error):
+                    LOG.error("Error collecting system metrics: %s", error)
+                    self.collect_error = str(error)
+        for name, source in self.sources.items():
+            try:
+                value = source()
+                if value is None:
+                    continue
+                value = float(value)
+            except Exception as error: # pylint: disable=broad-exception-caught
+                if self.errors.get(name) != str(error):
+                    LOG.error("Error sampling %s: %s", name, error)
+                    self.errors[name] = str(error)
+                continue
+            self.errors.pop(name, None)
+            with self.lock:
+                self.rings[name].add(value)
+                if self.filters[name].update(value, now) is True:
+                    self.accepted[name] = (self.filters[name].value, self.rings[name].aggregates())
+
+    def last(self, name):
+        """Returns the latest value of a metric"""
+        with self.lock:
+            return self.rings[name].last()
+
+    def filtered(self, name):
+        """
+        Returns the last value accepted by the filter of a metric and
+        min, avg and max at that time or None if there is no value yet
+        """
+        with self.lock:
+            return self.accepted.get(name)
+
+    def aggregates(self, name):
+        """Returns min, avg and max of a metric over the window"""
+        with self.lock:
+            return self.rings[name].aggregates()
+
+    def samples(self, name):
+        """Returns all values of a metric in the window from oldest to latest"""
+        with self.lock:
+            return self.rings[name].samples()
+
+    def run(self):
+        """Sample all sources every interval seconds"""
+        deadline = time.monotonic()
+        while True:
+            self.sample()
+            deadline += self.interval
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # sampling was too slow, skip the missed samples
+                deadline = time.monotonic()
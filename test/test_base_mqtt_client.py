@@ -0,0 +1,376 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Unit tests of the BaseMqttClient without mqtt broker.
+The messages are recorded instead of being sent to a broker.
+"""
+
+import os
+import sys
+
+from paho.mqtt import client as mqtt_client
+
+# import test object
+sys.path.append(os.path.abspath("./"))
+from base_mqtt_client import base_mqtt_client as BMC # pylint: disable=wrong-import-position
+
+#
+# global constants
+#
+CONFIG = """
+[global]
+broker=localhost
+port=1883
+username=
+password=
+topicRoot=test
+deviceName=display
+reconnectDelay=5
+publishDelay=3
+fullPublishCycle=20
+[feature]
+haDiscover=enabled
+[haDiscover]
+deviceName=test01
+base=homeassistant
+[logging]
+level=WARNING
+"""
+AVAILABILITY = "test/display/availability"
+
+
+class RecordingClient:
+    """Records the published messages instead of sending them to a broker"""
+
+    def __init__(self):
+        """Create an empty record"""
+        self.published = []
+        self.rc = mqtt_client.MQTT_ERR_SUCCESS
+
+    def publish(self, topic, payload, retain=False):
+        """Record a message"""
+        self.published.append((topic, payload, retain))
+        return (self.rc, len(self.published))
+
+
+def create_client(tmp_path, monkeypatch):
+    """Creates a client which works in tmp_path and records the messages"""
+    monkeypatch.chdir(tmp_path)
+    config_file = tmp_path / "test.ini"
+    config_file.write_text(CONFIG, encoding="utf-8")
+    client = BMC.BaseMqttClient(str(config_file))
+    client.client = RecordingClient()
+    return client
+
+
+def test_outbox_latest_per_topic(tmp_path, monkeypatch):
+    """Test that only the latest message of a topic is kept while offline"""
+    client = create_client(tmp_path, monkeypatch)
+    client.publish("test/a", b"1")
+    client.publish("test/b", b"1")
+    client.publish("test/a", b"2", retain=True)
+    assert client.client.published == []
+    info = client.outbox_statistics()
+    assert (info["queued"], info["replaced"], info["topics"]) == (3, 1, 2)
+    client.flush_outbox()
+    assert client.client.published == [
+        (AVAILABILITY, "online", True),
+        ("test/a", b"2", True),
+        ("test/b", b"1", False),
+    ]
+    assert client.outbox_statistics()["flushed"] == 2
+    # online: messages are sent directly
+    client.publish("test/a", b"3")
+    assert client.client.published[-1] == ("test/a", b"3", False)
+    assert client.outbox_statistics()["topics"] == 0
+
+
+def test_outbox_priority(tmp_path, monkeypatch):
+    """Test that discovery messages are sent before the states"""
+    client = create_client(tmp_path, monkeypatch)
+    client.publish("test/state", b"1")
+    client.publish("homeassistant/config", b"{}", True, BMC.PRIORITY_DISCOVERY)
+    client.flush_outbox()
+    assert [topic for topic, payload, retain in client.client.published] == [
+        AVAILABILITY,
+        "homeassistant/config",
+        "test/state",
+    ]
+
+
+def test_outbox_size(tmp_path, monkeypatch):
+    """Test that new topics are dropped if the outbox is full"""
+    client = create_client(tmp_path, monkeypatch)
+    for i in range(BMC.OUTBOX_SIZE):
+        client.publish(f"test/{i}", b"1")
+    assert client.publish("test/new", b"1")[0] == mqtt_client.MQTT_ERR_QUEUE_SIZE
+    # known topics are still replaced
+    assert client.publish("test/0", b"2")[0] == mqtt_client.MQTT_ERR_SUCCESS
+    info = client.outbox_statistics()
+    assert (info["topics"], info["dropped"], info["replaced"]) == (BMC.OUTBOX_SIZE, 1, 1)
+
+
+def test_outbox_no_connection(tmp_path, monkeypatch):
+    """Test that a message is kept if the connection is lost while online"""
+    client = create_client(tmp_path, monkeypatch)
+    client.flush_outbox()
+    client.client.rc = mqtt_client.MQTT_ERR_NO_CONN
+    assert client.publish("test/a", b"1")[0] == mqtt_client.MQTT_ERR_SUCCESS
+    assert client.outbox_statistics()["topics"] == 1
+
+
+def test_publish_unchanged(tmp_path, monkeypatch):
+    """Test that a publish method can force to send an unchanged value"""
+    client = create_client(tmp_path, monkeypatch)
+    client.flush_outbox()
+
+    def answer(topic, topic_config): # pylint: disable=unused-argument
+        client.unpublished = topic_config["force"]
+        return {"value": 1}
+
+    topic_config = {"topic": "answer", "publish": answer, "force": False}
+    for _ in range(2):
+        client.publish_topic(topic_config)
+    topic_config["force"] = True
+    client.publish_topic(topic_config)
+    assert [message[0] for message in client.client.published[1:]] == ["test/display/answer"] * 2
+
+
+class DiscoveryClient(BMC.BaseMqttClient):
+    """Client which discovers the configs of the dictionary configs"""
+
+    # prevent pytest to collect this class
+    __test__ = False
+
+    def __init__(self, config_file):
+        """Create the client without configs"""
+        self.configs = {}  # Key: topic, Value: payload
+        BMC.BaseMqttClient.__init__(self, config_file)
+
+    def ha_discover(self):
+        """Publish the configs"""
+        for topic, payload in self.configs.items():
+            self.ha_publish(topic, payload)
+
+
+def create_discovery_client(tmp_path, monkeypatch):
+    """Creates an online discovery client with two configs"""
+    monkeypatch.chdir(tmp_path)
+    config_file = tmp_path / "test.ini"
+    config_file.write_text(CONFIG, encoding="utf-8")
+    client = DiscoveryClient(str(config_file))
+    client.client = RecordingClient()
+    client.flush_outbox()
+    client.client.published = []
+    client.configs = {"ha/a/config": '{"a": 1}', "ha/b/config": '{"b": 1}'}
+    return client
+
+
+def test_discover_changed(tmp_path, monkeypatch):
+    """Test that only changed and removed configs are sent"""
+    client = create_discovery_client(tmp_path, monkeypatch)
+    client.discover()
+    assert [message[0] for message in client.client.published] == ["ha/a/config", "ha/b/config"]
+    assert all(message[2] is True for message in client.client.published)
+    # nothing changed
+    client.client.published = []
+    client.discover()
+    assert client.client.published == []
+    # one config changed, one removed
+    client.configs = {"ha/a/config": '{"a": 2}'}
+    client.discover()
+    assert client.client.published == [("ha/b/config", "", True), ("ha/a/config", '{"a": 2}', True)]
+    # force sends all configs
+    client.client.published = []
+    client.discover(force=True)
+    assert client.client.published == [("ha/a/config", '{"a": 2}', True)]
+
+
+def test_discover_hash_file(tmp_path, monkeypatch):
+    """Test that the hashes are kept over a restart and a broken file sends all"""
+    client = create_discovery_client(tmp_path, monkeypatch)
+    client.discover()
+    client = create_discovery_client(tmp_path, monkeypatch)
+    client.discover()
+    assert client.client.published == []
+    (tmp_path / ".ha_hashes").write_text("broken", encoding="utf-8")
+    client.discover()
+    assert len(client.client.published) == 2
+
+
+def test_discover_outbox_full(tmp_path, monkeypatch):
+    """Test that configs which were dropped by the full outbox are sent again"""
+    client = create_discovery_client(tmp_path, monkeypatch)
+    client.online = False
+    for i in range(BMC.OUTBOX_SIZE):
+        client.publish(f"test/{i}", b"1")
+    client.discover()
+    assert client.outbox_statistics()["dropped"] == 2
+    client.flush_outbox()
+    client.client.published = []
+    client.discover()
+    assert [message[0] for message in client.client.published] == ["ha/a/config", "ha/b/config"]
+
+
+def test_discover_queued(tmp_path, monkeypatch):
+    """Test that the hashes of queued configs are stored when the outbox is sent"""
+    client = create_discovery_client(tmp_path, monkeypatch)
+    client.online = False
+    client.discover()
+    assert not any(client.ha.read_hashes().values())
+    client.flush_outbox()
+    assert sorted(client.ha.read_hashes()) == ["ha/a/config", "ha/b/config"]
+    client.client.published = []
+    client.discover()
+    assert client.client.published == []
+
+
+def test_discover_failed(tmp_path, monkeypatch):
+    """Test that a config is sent again if its message failed"""
+    client = create_discovery_client(tmp_path, monkeypatch)
+    client.discover()
+    client.configs = {"ha/a/config": '{"a": 2}', "ha/b/config": '{"b": 1}'}
+    client.client.rc = mqtt_client.MQTT_ERR_PAYLOAD_SIZE
+    client.discover()
+    client.client.rc = mqtt_client.MQTT_ERR_SUCCESS
+    client.client.published = []
+    client.discover()
+    assert client.client.published == [("ha/a/config", '{"a": 2}', True)]
+
+
+def test_discover_disabled(tmp_path, monkeypatch):
+    """Test that all configs are removed if the discovery is disabled"""
+    client = create_discovery_client(tmp_path, monkeypatch)
+    client.discover()
+    client.client.published = []
+    client.ha_dc = False
+    client.discover()
+    assert client.client.published == [("ha/a/config", "", True), ("ha/b/config", "", True)]
+    client.client.published = []
+    client.discover()
+    assert client.client.published == []
+
+
+class FakeClock:
+    """Monotonic clock of the publish loop which advances while the loop waits"""
+
+    def __init__(self):
+        """Start at time 0"""
+        self.now = 0.0
+
+    def monotonic(self):
+        """Returns the current time"""
+        return self.now
+
+    def wait(self, delay):
+        """Wait of the publish wakeup event: advances the clock"""
+        self.now += delay
+        return False
+
+    def clear(self):
+        """Clear of the publish wakeup event"""
+
+
+class ScheduleClient(BMC.BaseMqttClient):
+    """Client with topics which record the time of every publish"""
+
+    # prevent pytest to collect this class
+    __test__ = False
+
+    def __init__(self, config_file, schedules, clock, end):
+        """Create a topic per schedule (Key: topic key, Value: schedule entries)"""
+        self.schedules = schedules
+        self.clock = clock
+        self.end = end  # the loop is stopped at this time
+        self.published = []  # (key, time) of every publish
+        BMC.BaseMqttClient.__init__(self, config_file)
+        self.publish_wakeup = clock
+
+    def read_client_config(self, config):
+        """Create the topic configuration"""
+        self.topic_config = {}
+        for key, schedule in self.schedules.items():
+            self.topic_config[key] = dict(schedule, topic=key, publish=self.record)
+            self.topic_config[key]["key"] = key
+
+    def record(self, topic, topic_config):
+        """Publish method of all topics. Stops the loop at the end time"""
+        if self.clock.now > self.end:
+            raise KeyboardInterrupt
+        self.published.append((topic_config["key"], round(self.clock.now, 3)))
+        self.clock.now += topic_config.get("duration", 0)
+
+
+def run_publish_loop(tmp_path, monkeypatch, schedules, end, config=""):
+    """Runs the publish loop on a fake clock until end. Returns the publishes"""
+    monkeypatch.chdir(tmp_path)
+    config_file = tmp_path / "test.ini"
+    config_file.write_text(CONFIG + config, encoding="utf-8")
+    clock = FakeClock()
+    monkeypatch.setattr(BMC.time, "monotonic", clock.monotonic)
+    client = ScheduleClient(str(config_file), schedules, clock, end)
+    client.client = RecordingClient()
+    client.publish_loop()
+    return client
+
+
+def test_schedule_order(tmp_path, monkeypatch):
+    """Test that every topic is published at its own deadlines"""
+    client = run_publish_loop(
+        tmp_path, monkeypatch, {"a": {"interval": 1}, "b": {"interval": 2.5}, "c": {}}, 6
+    )
+    assert client.published == [
+        ("a", 0), ("b", 0), ("c", 0),
+        ("a", 1), ("a", 2), ("b", 2.5), ("a", 3), ("c", 3),
+        ("a", 4), ("a", 5), ("b", 5), ("a", 6), ("c", 6),
+    ]
+
+
+def test_schedule_late(tmp_path, monkeypatch):
+    """Test that the missed deadlines of a slow topic are skipped"""
+    client = run_publish_loop(
+        tmp_path, monkeypatch, {"slow": {"interval": 1, "duration": 2.5}}, 10
+    )
+    assert client.published == [("slow", 0), ("slow", 3.5), ("slow", 7)]
+
+
+def test_schedule_jitter(tmp_path, monkeypatch):
+    """Test that the jitter delays the deadlines without drift"""
+    client = run_publish_loop(
+        tmp_path, monkeypatch, {"a": {"interval": 1, "jitter": 0.5}}, 100
+    )
+    assert len(client.published) == 100
+    for i, (key, published) in enumerate(client.published): # pylint: disable=unused-variable
+        assert i <= published <= i + 0.5
+
+
+def test_schedule_config(tmp_path, monkeypatch):
+    """Test that intervals which are not positive are ignored"""
+    client = run_publish_loop(
+        tmp_path,
+        monkeypatch,
+        {"a": {}, "b": {}},
+        6,
+        "[schedule]\naInterval=0\nbInterval=-1\nbJitter=-1\naFullPublish=nan\n",
+    )
+    assert "interval" not in client.topic_config["a"]
+    assert "full_publish" not in client.topic_config["a"]
+    assert "interval" not in client.topic_config["b"]
+    assert "jitter" not in client.topic_config["b"]
+    assert client.published == [("a", 0), ("b", 0), ("a", 3), ("b", 3), ("a", 6), ("b", 6)]
@@ -0,0 +1,115 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Unit tests of the job engine
+"""
+
+import os
+import sys
+import threading
+
+# import test object
+sys.path.append(os.path.abspath("./"))
+import job_engine as JE # pylint: disable=wrong-import-position
+
+#
+# global constants
+#
+WAIT_TIMEOUT = 5
+
+
+def wait_for_jobs(engine):
+    """Waits until all submitted jobs of the engine are finished"""
+    engine.pool.shutdown(wait=True)
+
+
+def test_job_limit():
+    """Test that jobs above the limit of a name are rejected"""
+    engine = JE.JobEngine(2)
+    engine.set_limit("shell", "test", 2)
+    first = engine.new_job("shell", "test")
+    second = engine.new_job("shell", "test")
+    assert engine.new_job("shell", "test") is None
+    # other names and names without limit are not affected
+    assert engine.new_job("shell", "other") is not None
+    assert engine.new_job("autogui", "click()") is not None
+    # the limit is only valid for the same kind of job
+    assert engine.new_job("autogui", "test") is not None
+    assert engine.status()["rejected"] == 1
+    # a finished job frees its slot
+    engine.finished(first, 0)
+    assert engine.new_job("shell", "test") is not None
+    assert engine.new_job("shell", "test") is None
+    assert second.id == first.id + 1
+    assert engine.status()["rejected"] == 2
+
+
+def test_job_limit_running():
+    """Test that running jobs in the pool count for the limit"""
+    release = threading.Event()
+
+    def blocked():
+        return 0 if release.wait(WAIT_TIMEOUT) else 1
+
+    engine = JE.JobEngine(2)
+    engine.set_limit("shell", "test", 1)
+    job = engine.submit("shell", "test", blocked)
+    assert job is not None
+    assert engine.submit("shell", "test", blocked) is None
+    assert engine.active("shell") == ["test"]
+    release.set()
+    wait_for_jobs(engine)
+    assert engine.active("shell") == []
+    assert job.state == JE.DONE
+
+
+def test_job_states():
+    """Test the states and exit codes of executed jobs"""
+
+    def fail():
+        raise RuntimeError("Test error")
+
+    changes = []
+    engine = JE.JobEngine(1, lambda: changes.append(1))
+    done = engine.submit("shell", "done", lambda: 0)
+    failed = engine.submit("shell", "failed", lambda: 2)
+    error = engine.submit("shell", "error", fail)
+    wait_for_jobs(engine)
+    assert (done.state, done.exit_code) == (JE.DONE, 0)
+    assert (failed.state, failed.exit_code) == (JE.FAILED, 2)
+    assert (error.state, error.exit_code) == (JE.FAILED, 1)
+    # queued, started and finished of every job
+    assert len(changes) == 9
+    status = engine.status()
+    assert status["submitted"] == 3
+    assert status["queued"] == 0 and status["running"] == 0
+    assert [job["name"] for job in status["jobs"]] == ["done", "failed", "error"]
+
+
+def test_job_history():
+    """Test that only the last finished jobs are kept"""
+    engine = JE.JobEngine(1)
+    for i in range(JE.JOB_HISTORY + 5):
+        engine.finished(engine.new_job("autogui", str(i)), None, JE.CANCELED)
+    active = engine.new_job("autogui", "active")
+    jobs = engine.status()["jobs"]
+    assert len(jobs) == JE.JOB_HISTORY + 1
+    assert jobs[0]["name"] == "5"
+    assert jobs[-1]["id"] == active.id
+    assert jobs[-1]["state"] == JE.QUEUED
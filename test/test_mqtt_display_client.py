@@ -459,6 +459,56 @@ def test_system_content_basic():
     assert data["default_url"] == TST_CLIENT.default_url.strip()
 
 
+def test_system_content_connection():
+    """Test the connection statistic in the system topic"""
+    data = json.loads(TST_CLIENT.get_data("system"))
+    assert "connection" in data
+    for key in ("reconnects", "attempts", "outage"):
+        assert key in data["connection"]
+    assert data["connection"]["reconnects"] >= 0
+
+
+def test_system_content_outbox():
+    """Test the outbox statistic in the system topic"""
+    data = json.loads(TST_CLIENT.get_data("system"))
+    assert "outbox" in data
+    for key in ("queued", "replaced", "dropped", "flushed", "topics", "bytes"):
+        assert key in data["outbox"]
+    # the client is online: nothing waits in the outbox
+    assert data["outbox"]["topics"] == 0
+
+
+def test_system_content_metrics():
+    """Test min, avg and max of the sampled system metrics"""
+    data = json.loads(TST_CLIENT.get_data("system"))
+    assert "metrics" in data
+    for name in ("cpu_temp", "cpu_load", "disk_usage"):
+        assert name in data["metrics"], f"No samples of {name}"
+        metric = data["metrics"][name]
+        assert metric["min"] <= metric["avg"] <= metric["max"]
+
+
+def test_system_content_proc():
+    """Test the metrics of the /proc collector"""
+    data = json.loads(TST_CLIENT.get_data("system"))
+    for name in ("mem_available", "uptime", "disk_free"):
+        assert name in data["metrics"], f"No samples of {name}"
+    assert data["mem_available"] > 0
+    assert data["uptime"] > 0
+    assert data["disk_free"] > 0
+
+
+def test_samples():
+    """Test that every samples command is answered"""
+    for _ in range(2):
+        TST_CLIENT.topic_data.pop(TST_CLIENT.topic_root + "/samples", None)
+        TST_CLIENT.send_cmd("samples", "disk_usage")
+        time.sleep(2)
+        data = json.loads(TST_CLIENT.get_data("samples"))
+        assert data["name"] == "disk_usage"
+        assert len(data["values"]) > 0
+
+
 def test_shell_content():
     """Test the content of shell topic"""
     assert TST_CLIENT.wait_for_data("shell", MDC.IDLE), "Shell contains no idle content"
@@ -480,6 +530,17 @@ def test_shell_command():
     assert not os.path.isfile("test.txt"), "test file not deleted"
 
 
+def test_jobs_content():
+    """Test the job status of the shell command"""
+    data = json.loads(TST_CLIENT.get_data("jobs"))
+    jobs = [job for job in data["jobs"] if job["type"] == "shell"]
+    assert len(jobs) > 0, "No shell job in jobs topic"
+    assert jobs[-1]["name"] == "TEST"
+    assert jobs[-1]["state"] == "done"
+    assert jobs[-1]["exit_code"] == 0
+    assert jobs[-1]["duration"] >= 5
+
+
 def test_set_url():
     """Test the url topic"""
     TST_CLIENT.send_cmd("url", "https://www.google.com/")
@@ -581,6 +642,28 @@ def test_brightness():
     assert TST_CLIENT.get_brightness() == TST_CLIENT.calc_brightness(50)
 
 
+def test_light_transition():
+    """Test a brightness transition of the json light"""
+    TST_CLIENT.send_cmd("light", json.dumps({"state": "ON", "brightness": 0}))
+    time.sleep(1)
+    assert TST_CLIENT.get_brightness() == TST_CLIENT.calc_brightness(0)
+    TST_CLIENT.send_cmd("light", json.dumps({"state": "ON", "brightness": 100, "transition": 2}))
+    time.sleep(1)
+    assert TST_CLIENT.get_brightness() < TST_CLIENT.calc_brightness(100), "No transition"
+    time.sleep(2)
+    assert TST_CLIENT.get_brightness() == TST_CLIENT.calc_brightness(100)
+    data = json.loads(TST_CLIENT.get_data("light"))
+    assert data["state"] == "ON"
+    TST_CLIENT.send_cmd("light", json.dumps({"state": "ON", "brightness": 50}))
+    time.sleep(1)
+    assert TST_CLIENT.get_brightness() == TST_CLIENT.calc_brightness(50)
+    # invalid transitions are rejected
+    for transition in ("1e999", "NaN", "-1"):
+        TST_CLIENT.send_cmd("light", f'{{"state": "ON", "brightness": 0, "transition": {transition}}}')
+    time.sleep(1)
+    assert TST_CLIENT.get_brightness() == TST_CLIENT.calc_brightness(50)
+
+
 #
 # Test autogui features
 #
@@ -715,6 +798,14 @@ def test_autogui_wrong_syntax_16():
     assert TST_CLIENT.wait_for_data("autogui", "Unknown command: 'test16(\" \")'")
 
 
+def test_autogui_cancel():
+    """Test cancel of a running autogui command list"""
+    TST_CLIENT.send_cmd("autogui", "wait(20000);click()")
+    assert TST_CLIENT.wait_for_data("autogui", "EXEC: wait(20000);click()")
+    TST_CLIENT.send_cmd("autogui", "cancel")
+    assert TST_CLIENT.wait_for_data("autogui", "CANCELED: wait(20000);click()")
+
+
 #
 # Test finsh...
 #
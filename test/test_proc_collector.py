@@ -0,0 +1,128 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Unit tests of the /proc collector. The /proc files are created in a
+temporary directory.
+"""
+
+import logging
+import os
+import sys
+
+# import test object
+sys.path.append(os.path.abspath("./"))
+import proc_collector as PC # pylint: disable=wrong-import-position
+
+#
+# global constants
+#
+MEMINFO = """MemTotal:        3882012 kB
+MemFree:          912344 kB
+MemAvailable:    2048000 kB
+SwapTotal:        204800 kB
+SwapFree:         102400 kB
+"""
+NET_DEV = """Inter-|   Receive                            |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo: 1000 10 0 0 0 0 0 0 1000 10 0 0 0 0 0 0
+  wlan0: {rx} 10 0 0 0 0 0 0 {tx} 10 0 0 0 0 0 0
+"""
+WIRELESS = """Inter-| sta-|   Quality        |   Discarded packets               | Missed | WE
+ face | tus | link level noise |  nwid  crypt   frag  retry   misc | beacon | 22
+ wlan0: 0000   50.  -60.  -256        0      0      0      0      0        0
+"""
+
+
+def create_proc(path, statm="2000 1024 300 10 0 400 0\n"):
+    """Creates the /proc files, the thermal file and a browser process in path"""
+    (path / "net").mkdir()
+    (path / "temp").write_text("48312\n")
+    (path / "loadavg").write_text("0.50 0.25 0.10 1/200 4242\n")
+    (path / "meminfo").write_text(MEMINFO)
+    (path / "uptime").write_text("3600.50 7000.00\n")
+    (path / "net" / "dev").write_text(NET_DEV.format(rx=0, tx=0))
+    (path / "net" / "wireless").write_text(WIRELESS)
+    (path / "42").mkdir()
+    (path / "42" / "comm").write_text("chromium\n")
+    (path / "42" / "statm").write_text(statm)
+
+
+def create_collector(path):
+    """Creates a collector of the files in path"""
+    return PC.ProcCollector(str(path), str(path), str(path / "temp"))
+
+
+def test_collect(tmp_path):
+    """Test the values of all metrics"""
+    create_proc(tmp_path)
+    collector = create_collector(tmp_path)
+    values = collector.collect()
+    assert values["cpu_temp"] == 48.312
+    assert values["cpu_load"] == 25
+    assert values["mem_available"] == 2000
+    assert values["swap_used"] == 100
+    assert values["uptime"] == 3600.5
+    assert values["wifi_rssi"] == -60
+    assert values["chromium_rss"] == 1024 * collector.page_size / PC.MB
+    assert values["disk_free"] > 0
+    # the rates need two samples
+    assert "net_rx" not in values
+    (tmp_path / "net" / "dev").write_text(NET_DEV.format(rx=1024 * 1000, tx=2048))
+    values = collector.collect()
+    assert values["net_rx"] > values["net_tx"] > 0
+
+
+def test_collect_errors(tmp_path):
+    """Test that malformed files do not stop the collector"""
+    create_proc(tmp_path, statm="\n")
+    collector = create_collector(tmp_path)
+    (tmp_path / "uptime").write_text("invalid\n")
+    values = collector.collect()
+    # the browser process with the malformed statm is removed
+    assert "chromium_rss" not in values
+    assert collector.chromium == {}
+    assert "uptime" not in values
+    assert values["mem_available"] == 2000
+    assert values["disk_free"] > 0
+
+
+def test_missing_files(tmp_path):
+    """Test a system without network and browser"""
+    (tmp_path / "meminfo").write_text(MEMINFO)
+    collector = PC.ProcCollector(str(tmp_path), str(tmp_path / "missing"), str(tmp_path / "temp"))
+    values = collector.collect()
+    assert sorted(values) == ["mem_available", "swap_used"]
+
+
+def test_error_logged_once(tmp_path, caplog):
+    """Test that a repeated error of a reader is only logged once"""
+    create_proc(tmp_path)
+    collector = create_collector(tmp_path)
+    (tmp_path / "temp").write_text("invalid\n")
+    with caplog.at_level(logging.ERROR, logger="ProcCollector"):
+        collector.collect()
+        collector.collect()
+        assert len(caplog.records) == 1
+        assert "thermal" in collector.errors
+        (tmp_path / "temp").write_text("50000\n")
+        assert collector.collect()["cpu_temp"] == 50
+        assert "thermal" not in collector.errors
+        (tmp_path / "temp").write_text("invalid\n")
+        collector.collect()
+        assert len(caplog.records) == 2
@@ -0,0 +1,56 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Unit tests of the configuration of the system metrics
+"""
+
+import logging
+import os
+import sys
+
+import pytest
+
+# import test object
+sys.path.append(os.path.abspath("./"))
+import system_metrics as SM # pylint: disable=wrong-import-position
+
+
+def test_metric_filter():
+    """Test the default filter of a metric and its configuration"""
+    band = SM.read_metric_filter({}, "uptime")
+    assert (band.deadband, band.alpha, band.max_age) == SM.METRIC_FILTERS["uptime"]
+    band = SM.read_metric_filter({"uptimeDeadband": "60", "uptimeAlpha": "0.5"}, "uptime")
+    assert (band.deadband, band.alpha, band.max_age) == (60, 0.5, 0)
+    for section in ({"uptimeDeadband": "x"}, {"uptimeMaxAge": "-1"}, {"uptimeAlpha": "0"}):
+        with pytest.raises(RuntimeError):
+            SM.read_metric_filter(section, "uptime")
+
+
+def test_create_sampler():
+    """Test that the sampler reads all metrics with the configured interval"""
+    sampler, collector = SM.create_sampler(
+        {"system": {"sampleInterval": "0.5", "samples": "3"}}, logging.getLogger()
+    )
+    assert sampler.interval == 0.5
+    assert set(sampler.sources) <= set(SM.METRIC_DIGITS)
+    sampler.sample()
+    assert sampler.last("mem_available") == collector.values["mem_available"]
+    for system in ({"samples": "0"}, {"sampleInterval": "x"}):
+        with pytest.raises(RuntimeError):
+            SM.create_sampler({"system": system}, logging.getLogger())
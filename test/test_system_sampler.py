@@ -0,0 +1,147 @@
+# python
+#
+# This file is part of the mqttDisplayClient distribution
+# (https://github.com/olialb/mqttDisplayClient).
+# Copyright (c) 2025 Oliver Albold.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 3.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Unit tests of the ring buffers and the system sampler
+"""
+
+import os
+import sys
+
+# import test object
+sys.path.append(os.path.abspath("./"))
+import system_sampler as SS # pylint: disable=wrong-import-position
+
+
+def test_ring_buffer():
+    """Test the order and the aggregates of the values in the ring buffer"""
+    ring = SS.RingBuffer(3)
+    assert ring.last() is None
+    assert ring.samples() == []
+    assert ring.aggregates() is None
+    ring.add(1)
+    ring.add(2)
+    assert ring.samples() == [1.0, 2.0]
+    assert ring.aggregates() == {"min": 1.0, "avg": 1.5, "max": 2.0}
+    for value in (3, 4, 5):
+        ring.add(value)
+    # the oldest values are overwritten
+    assert ring.last() == 5.0
+    assert ring.samples() == [3.0, 4.0, 5.0]
+    assert ring.aggregates() == {"min": 3.0, "avg": 4.0, "max": 5.0}
+    ring.add(1 / 3)
+    assert ring.aggregates(1) == {"min": 0.3, "avg": 3.1, "max": 5.0}
+
+
+def test_sampler():
+    """Test that the sampler stores the values of all sources"""
+    values = iter(range(10))
+    sampler = SS.SystemSampler(
+        {"count": lambda: next(values), "text": lambda: "1.5", "none": lambda: None},
+        samples=4,
+    )
+    for _ in range(5):
+        sampler.sample()
+    assert sampler.samples("count") == [1.0, 2.0, 3.0, 4.0]
+    assert sampler.last("count") == 4.0
+    assert sampler.aggregates("count") == {"min": 1.0, "avg": 2.5, "max": 4.0}
+    assert sampler.samples("text") == [1.5] * 4
+    assert sampler.samples("none") == []
+    assert sampler.aggregates("none") is None
+
+
+def test_sampler_source_error():
+    """Test that a failing source does not stop the other sources"""
+
+    def fail():
+        raise OSError("Test error")
+
+    sampler = SS.SystemSampler({"fail": fail, "ok": lambda: 1})
+    sampler.sample()
+    sampler.sample()
+    assert sampler.samples("fail") == []
+    assert sampler.samples("ok") == [1.0, 1.0]
+    assert sampler.errors == {"fail": "Test error"}
+
+
+def test_deadband():
+    """Test that only values outside of the deadband are accepted"""
+    band = SS.DeadbandFilter(deadband=2)
+    assert band.update(10, 0) is True
+    assert band.update(12, 1) is False
+    assert band.update(8, 2) is False
+    assert band.update(12.5, 3) is True
+    assert band.value == 12.5
+    assert band.update(10.5, 4) is False
+    assert band.value == 12.5
+
+
+def test_deadband_max_age():
+    """Test that the value is accepted inside the deadband after max_age"""
+    band = SS.DeadbandFilter(deadband=2, max_age=10)
+    assert band.update(10, 0) is True
+    assert band.update(11, 9) is False
+    assert band.update(11, 10) is True
+    assert band.value == 11
+    assert band.update(11, 19) is False
+
+
+def test_deadband_ema():
+    """Test the exponential moving average of the filter"""
+    band = SS.DeadbandFilter(deadband=1, alpha=0.5)
+    assert band.update(10, 0) is True
+    # a single spike is smoothed
+    assert band.update(12, 1) is False
+    assert band.smoothed == 11
+    assert band.update(12, 2) is True
+    assert band.value == 11.5
+
+
+def test_sampler_filter():
+    """Test that the filtered value and the aggregates change together"""
+    values = iter([10, 11, 14, 15])
+    sampler = SS.SystemSampler(
+        {"value": lambda: next(values)},
+        samples=2,
+        filters={"value": SS.DeadbandFilter(deadband=2)},
+    )
+    sampler.sample()
+    assert sampler.filtered("value") == (10, {"min": 10.0, "avg": 10.0, "max": 10.0})
+    sampler.sample()
+    assert sampler.filtered("value") == (10, {"min": 10.0, "avg": 10.0, "max": 10.0})
+    sampler.sample()
+    assert sampler.filtered("value") == (14, {"min": 11.0, "avg": 12.5, "max": 14.0})
+    sampler.sample()
+    assert sampler.filtered("value")[0] == 14
+    assert sampler.aggregates("value") == {"min": 14.0, "avg": 14.5, "max": 15.0}
+
+
+def test_sampler_collect_error():
+    """Test that an error of collect is logged once and the sources are read"""
+    calls = []
+
+    def collect():
+        calls.append(1)
+        raise ValueError("Test error")
+
+    sampler = SS.SystemSampler({"ok": lambda: 1}, collect=collect)
+    sampler.sample()
+    sampler.sample()
+    assert len(calls) == 2
+    assert sampler.collect_error == "Test error"
+    assert sampler.samples("ok") == [1.0, 1.0]